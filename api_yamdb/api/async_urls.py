@@ -0,0 +1,26 @@
+'''
+Корневой urlconf для ASGI (api_yamdb.asgi): чтение произведений,
+отзывов и комментариев обслуживают асинхронные представления, все
+остальные адреса — как в api_yamdb.urls.
+'''
+from django.urls import include, path, re_path
+
+from . import async_views
+
+TITLE = r'^api/v1/titles/(?P<{}>\d+)/'
+REVIEW = TITLE.format('title_id') + r'reviews/(?P<{}>\d+)/'
+
+urlpatterns = [
+    path('api/v1/titles/', async_views.title_list, name='titles-list'),
+    re_path(TITLE.format('pk') + '$', async_views.title_detail,
+            name='titles-detail'),
+    re_path(TITLE.format('title_id') + 'reviews/$', async_views.review_list,
+            name='reviews-list'),
+    re_path(REVIEW.format('pk') + '$', async_views.review_detail,
+            name='reviews-detail'),
+    re_path(REVIEW.format('review_id') + 'comments/$',
+            async_views.comment_list, name='comments-list'),
+    re_path(REVIEW.format('review_id') + r'comments/(?P<pk>\d+)/$',
+            async_views.comment_detail, name='comments-detail'),
+    path('', include('api_yamdb.urls')),
+]
@@ -0,0 +1,78 @@
+'''
+Асинхронное чтение каталога, отзывов и комментариев под ASGI
+(api_yamdb.asgi). В Django 3.2 синхронные представления под ASGI
+выполняются в одном потоке на процесс, поэтому медленный запрос к базе
+задерживает все остальные. Здесь GET, анонимные и с токеном,
+выполняются в пуле потоков, как async ORM в Django 4.1+: цикл событий
+обслуживает медленных клиентов, а запросы к базе идут параллельно, у
+каждого потока своё постоянное соединение. Ответы формируют те же
+представления DRF, поэтому совпадают с WSGI байт в байт.
+
+Пул отдельный и ограничен ASYNC_READ_THREADS: в общем пуле asyncio
+потоков до min(32, CPU + 4), и каждый держал бы своё соединение. Процесс
+открывает не больше ASYNC_READ_THREADS + 1 соединений (ещё одно у потока
+для записи).
+'''
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+
+from .views import CommentsViewSet, ReviewsViewSet, TitleViewSet
+
+SAFE_READS = ('GET', 'HEAD')
+
+LIST_ACTIONS = {'get': 'list', 'post': 'create'}
+DETAIL_ACTIONS = {'get': 'retrieve', 'put': 'update',
+                  'patch': 'partial_update', 'delete': 'destroy'}
+
+read_executor = ThreadPoolExecutor(
+    max_workers=settings.ASYNC_READ_THREADS, thread_name_prefix='async-read'
+)
+
+
+def database_sync_to_async(func):
+    '''
+    sync_to_async в пуле read_executor. Сигналы request_started и
+    request_finished закрывают соединения только своего потока, поэтому
+    устаревшие соединения потоков пула закрываются здесь.
+    '''
+    def run(*args, **kwargs):
+        close_old_connections()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            close_old_connections()
+    return sync_to_async(run, thread_sensitive=False,
+                         executor=read_executor)
+
+
+def read_view(view):
+    '''
+    Асинхронное представление поверх представления DRF: GET и HEAD, в том
+    числе с токеном, выполняются и рендерятся в пуле потоков, запись идёт
+    в view как при синхронном вызове.
+    '''
+    def read(request, *args, **kwargs):
+        return view(request, *args, **kwargs).render()
+
+    pooled = database_sync_to_async(read)
+    sensitive = sync_to_async(view, thread_sensitive=True)
+
+    async def async_view(request, *args, **kwargs):
+        if request.method in SAFE_READS:
+            return await pooled(request, *args, **kwargs)
+        return await sensitive(request, *args, **kwargs)
+
+    # CSRF, как и во view, проверяет аутентификация DRF.
+    async_view.csrf_exempt = True
+    return async_view
+
+
+title_list = read_view(TitleViewSet.as_view(LIST_ACTIONS))
+title_detail = read_view(TitleViewSet.as_view(DETAIL_ACTIONS))
+review_list = read_view(ReviewsViewSet.as_view(LIST_ACTIONS))
+review_detail = read_view(ReviewsViewSet.as_view(DETAIL_ACTIONS))
+comment_list = read_view(CommentsViewSet.as_view(LIST_ACTIONS))
+comment_detail = read_view(CommentsViewSet.as_view(DETAIL_ACTIONS))
@@ -0,0 +1,72 @@
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.tokens import AccessToken
+from reviews.models import User
+
+USER_STATE_KEY = 'user:{user_id}:state'
+# Поля пользователя, которых достаточно для проверки прав.
+STATE_FIELDS = ('id', 'username', 'role', 'is_staff', 'is_superuser',
+                'is_active')
+CLAIM_FIELDS = ('username', 'role', 'is_staff', 'is_superuser')
+
+
+def user_state(user):
+    return {field: getattr(user, field) for field in STATE_FIELDS}
+
+
+def token_for_user(user):
+    '''
+    Access-токен с ролью и флагами пользователя в claims. Claims — для
+    клиентов, права проверяются по состоянию из кэша или базы.
+    '''
+    token = AccessToken.for_user(user)
+    for field in CLAIM_FIELDS:
+        token[field] = getattr(user, field)
+    return token
+
+
+def remember_user_state(user):
+    '''
+    Кладёт актуальное состояние в кэш, чтобы запросы после изменения
+    пользователя не обращались к базе. Срок тот же, что при промахе,
+    USER_STATE_CACHE_TIMEOUT: с LocMemCache другие процессы этой записи
+    не видят, и дольше него устаревшая роль в них не держится.
+    '''
+    cache.set(USER_STATE_KEY.format(user_id=user.id), user_state(user),
+              settings.USER_STATE_CACHE_TIMEOUT)
+
+
+def forget_user(user_id):
+    cache.set(USER_STATE_KEY.format(user_id=user_id), {'is_active': False},
+              settings.USER_STATE_CACHE_TIMEOUT)
+
+
+class CachedUserJWTAuthentication(JWTAuthentication):
+    '''
+    Строит request.user без обращения к базе, если состояние пользователя
+    есть в кэше. При промахе (вытеснение, перезапуск процесса, отдельный
+    LocMemCache воркера) состояние читается из базы и кэшируется на
+    USER_STATE_CACHE_TIMEOUT секунд: claims токена живут сутки и после
+    смены роли или блокировки источником правды быть не могут.
+    '''
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get('user_id')
+        if user_id is None:
+            return super().get_user(validated_token)
+        key = USER_STATE_KEY.format(user_id=user_id)
+        state = cache.get(key)
+        if state is None:
+            state = User.objects.filter(pk=user_id).values(
+                *STATE_FIELDS
+            ).first() or {'is_active': False}
+            cache.set(key, state, settings.USER_STATE_CACHE_TIMEOUT)
+        if not state['is_active']:
+            raise AuthenticationFailed('Пользователь не найден или '
+                                       'неактивен', code='user_inactive')
+        user = User(**state)
+        user._state.adding = False
+        user._state.db = 'default'
+        return user
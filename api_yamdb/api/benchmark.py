@@ -0,0 +1,157 @@
+'''
+Замер задержек и числа SQL-запросов для маршрутов api/urls.py: чтение,
+служебные эндпоинты и повторяемые записи. Удаление и повторный отзыв
+одного автора после первого запроса отвечали бы 404 и 400, поэтому не
+замеряются.
+'''
+import math
+import time
+from collections import namedtuple
+from itertools import count
+
+from django.contrib.auth.tokens import default_token_generator
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from reviews.models import Comment, Review, Title, TitleRanking, User
+
+from .authentication import token_for_user
+
+Route = namedtuple('Route', ('name', 'method', 'path', 'data', 'auth'))
+Result = namedtuple(
+    'Result', ('route', 'status', 'p50', 'p95', 'p99', 'queries')
+)
+
+
+def percentile(values, percent):
+    '''Перцентиль методом ближайшего ранга.'''
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(percent / 100 * len(ordered)) - 1)]
+
+
+def build_routes():
+    '''
+    Маршруты API с реальными id из базы; нужен хотя бы один отзыв.
+    Записи повторяемы: PATCH отзыва тем же текстом, новый комментарий,
+    массовая загрузка существующих категории и произведения.
+    '''
+    review = (Review.objects.filter(comments__isnull=False).first()
+              or Review.objects.first())
+    if review is None:
+        raise ValueError('В базе нет отзывов, запустите generate_dataset')
+    title = Title.objects.get(pk=review.title_id)
+    comment = Comment.objects.filter(review=review).first()
+    admin, _ = User.objects.get_or_create(
+        username='bench_admin',
+        defaults={'email': 'bench_admin@yamdb.fake', 'role': User.ADMIN},
+    )
+    user, _ = User.objects.get_or_create(
+        username='bench_user', defaults={'email': 'bench_user@yamdb.fake'}
+    )
+    confirmation_code = default_token_generator.make_token(user)
+    signups = count()
+
+    def signup_data():
+        number = next(signups)
+        return {'username': f'bench_signup{number}',
+                'email': f'bench_signup{number}@yamdb.fake'}
+
+    reviews = f'/api/v1/titles/{title.id}/reviews/'
+    comments = f'{reviews}{review.id}/comments/'
+    routes = [
+        Route('users-list', 'get', '/api/v1/users/', None, admin),
+        Route('users-detail', 'get', f'/api/v1/users/{user.username}/',
+              None, admin),
+        Route('users-me', 'get', '/api/v1/users/me/', None, user),
+        Route('category-list', 'get', '/api/v1/categories/', None, None),
+        Route('genre-list', 'get', '/api/v1/genres/', None, None),
+        Route('titles-list', 'get', '/api/v1/titles/', None, None),
+        Route('titles-detail', 'get', f'/api/v1/titles/{title.id}/',
+              None, None),
+        Route('titles-stats', 'get', f'/api/v1/titles/{title.id}/stats/',
+              None, None),
+        Route('titles-top', 'get',
+              f'/api/v1/titles/top/?board={TitleRanking.TOP}', None, None),
+        Route('titles-trending', 'get',
+              f'/api/v1/titles/top/?board={TitleRanking.TRENDING}',
+              None, None),
+        Route('reviews-list', 'get', reviews, None, None),
+        Route('reviews-detail', 'get', f'{reviews}{review.id}/', None, None),
+        Route('comments-list', 'get', comments, None, None),
+    ]
+    if comment is not None:
+        routes.append(Route('comments-detail', 'get',
+                            f'{comments}{comment.id}/', None, None))
+    routes += [
+        Route('metrics', 'get', '/api/v1/metrics/', None, admin),
+        Route('export', 'get', '/api/v1/export/titles/', None, admin),
+        Route('signup', 'post', '/api/v1/auth/signup/', signup_data, None),
+        Route('login', 'post', '/api/v1/auth/token/',
+              lambda: {'username': user.username,
+                       'confirmation_code': confirmation_code}, None),
+        Route('reviews-update', 'patch', f'{reviews}{review.id}/',
+              lambda: {'text': review.text}, admin),
+        Route('comments-create', 'post', comments,
+              lambda: {'text': 'bench'}, user),
+    ]
+    if title.category is not None:
+        category = title.category
+        genres = list(title.genre.values_list('slug', flat=True))
+        routes += [
+            Route('category-bulk', 'post', '/api/v1/categories/bulk/',
+                  lambda: [{'name': category.name, 'slug': category.slug}],
+                  admin),
+            Route('titles-bulk', 'post', '/api/v1/titles/bulk/',
+                  lambda: [{'name': title.name, 'year': title.year,
+                            'category': category.slug, 'genre': genres,
+                            'description': title.description}], admin),
+        ]
+    return routes
+
+
+def request(client, route):
+    kwargs = {}
+    if route.auth is not None:
+        token = token_for_user(route.auth)
+        kwargs['HTTP_AUTHORIZATION'] = f'Bearer {token}'
+    if route.data is not None:
+        kwargs['data'] = route.data()
+        kwargs['content_type'] = 'application/json'
+    response = getattr(client, route.method)(route.path, **kwargs)
+    if response.streaming:
+        # Выгрузка формируется при чтении тела, оно входит в замер.
+        b''.join(response.streaming_content)
+    return response
+
+
+def run_benchmark(routes, requests=50, warmup=3, cached=False):
+    '''
+    Выполняет каждый маршрут requests раз и возвращает список Result.
+    Без cached кэш очищается перед каждым запросом, чтобы мерить
+    обращения к базе, а не попадания в кэш каталога.
+    '''
+    client = Client()
+    results = []
+    for route in routes:
+        for _ in range(warmup):
+            request(client, route)
+        timings = []
+        queries = 0
+        for _ in range(requests):
+            if not cached:
+                cache.clear()
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                response = request(client, route)
+                timings.append((time.perf_counter() - started) * 1000)
+            queries = max(queries, len(captured))
+        results.append(Result(
+            route=route,
+            status=response.status_code,
+            p50=percentile(timings, 50),
+            p95=percentile(timings, 95),
+            p99=percentile(timings, 99),
+            queries=queries,
+        ))
+    return results
@@ -0,0 +1,190 @@
+'''
+Пакетная загрузка (создание или обновление) категорий, жанров и
+произведений: проверки для всего пакета выполняются несколькими
+запросами с IN, запись — через bulk_create/bulk_update в одной
+транзакции. Ошибки возвращаются списком по позициям пакета, как у
+сериализатора с many=True, и тогда ничего не записывается.
+'''
+from django.db import transaction
+from rest_framework import serializers
+from rest_framework.validators import UniqueTogetherValidator
+from reviews.models import Category, Genre, GenreTitle, Title
+
+from .cache import bump_generation_on_commit
+from .serializers import BulkSlugSerializer, BulkTitleSerializer
+from .signals import CATALOG_DEPENDENCIES
+
+TITLE_KEY_FIELDS = ('name', 'year', 'category')
+
+
+class BulkError(Exception):
+    def __init__(self, errors):
+        super().__init__(errors)
+        self.errors = errors
+
+
+def validate_items(serializer_class, items):
+    '''Проверяет поля каждого элемента без обращений к базе.'''
+    if not isinstance(items, list) or not items:
+        raise BulkError({'non_field_errors': [
+            'Ожидается непустой список объектов.'
+        ]})
+    serializers_ = [serializer_class(data=item) for item in items]
+    errors = [
+        {} if serializer.is_valid() else dict(serializer.errors)
+        for serializer in serializers_
+    ]
+    return [serializer.validated_data for serializer in serializers_], errors
+
+
+def add_error(errors, index, field, message):
+    errors[index].setdefault(field, []).append(message)
+
+
+def raise_if_errors(errors):
+    if any(errors):
+        raise BulkError(errors)
+
+
+def does_not_exist(value):
+    return serializers.SlugRelatedField.default_error_messages[
+        'does_not_exist'
+    ].format(slug_name='slug', value=value)
+
+
+def unique_together_message():
+    return str(UniqueTogetherValidator.message).format(
+        field_names=', '.join(TITLE_KEY_FIELDS)
+    )
+
+
+def check_batch_duplicates(items, errors, key, field,
+                           message='Повторяется в пакете.'):
+    seen = set()
+    for index, item in enumerate(items):
+        if errors[index]:
+            continue
+        value = key(item)
+        if value in seen:
+            add_error(errors, index, field, message)
+        seen.add(value)
+
+
+@transaction.atomic
+def upsert_slugs(model, items):
+    '''Создаёт или переименовывает объекты Category/Genre по slug.'''
+    items, errors = validate_items(BulkSlugSerializer, items)
+    check_batch_duplicates(items, errors, lambda item: item['slug'], 'slug')
+    check_batch_duplicates(items, errors, lambda item: item['name'], 'name')
+    name_owners = dict(model.objects.filter(
+        name__in=[item['name'] for item in items if item]
+    ).values_list('name', 'slug'))
+    for index, item in enumerate(items):
+        owner = item and name_owners.get(item['name'])
+        if owner and owner != item['slug']:
+            add_error(errors, index, 'name',
+                      f'Название уже занято объектом {owner}.')
+    raise_if_errors(errors)
+
+    existing = model.objects.in_bulk(
+        [item['slug'] for item in items], field_name='slug'
+    )
+    created, changed = [], []
+    for item in items:
+        obj = existing.get(item['slug'])
+        if obj is None:
+            created.append(model(**item))
+        elif obj.name != item['name']:
+            obj.name = item['name']
+            changed.append(obj)
+    model.objects.bulk_create(created)
+    model.objects.bulk_update(changed, ('name',))
+    # bulk_create/bulk_update не вызывают сигналов.
+    bump_generation_on_commit(*CATALOG_DEPENDENCIES[model])
+    return list(model.objects.filter(
+        slug__in=[item['slug'] for item in items]
+    ))
+
+
+def resolve_title_slugs(items, errors):
+    valid = [item for item in items if item]
+    categories = dict(Category.objects.filter(
+        slug__in={item['category'] for item in valid}
+    ).values_list('slug', 'id'))
+    genres = dict(Genre.objects.filter(
+        slug__in={slug for item in valid for slug in item['genre']}
+    ).values_list('slug', 'id'))
+    for index, item in enumerate(items):
+        if not item:
+            continue
+        if item['category'] not in categories:
+            add_error(errors, index, 'category',
+                      does_not_exist(item['category']))
+        for slug in item['genre']:
+            if slug not in genres:
+                add_error(errors, index, 'genre', does_not_exist(slug))
+    return categories, genres
+
+
+def title_key(item):
+    return item['name'], item['year'], item['category']
+
+
+def find_titles(keys):
+    '''Возвращает {(name, year, category_id): Title} для ключей пакета.'''
+    if not keys:
+        return {}
+    titles = Title.objects.filter(
+        name__in={key[0] for key in keys},
+        year__in={key[1] for key in keys},
+        category_id__in={key[2] for key in keys},
+    ).defer('search_vector')
+    return {
+        (title.name, title.year, title.category_id): title
+        for title in titles
+        if (title.name, title.year, title.category_id) in keys
+    }
+
+
+@transaction.atomic
+def upsert_titles(items):
+    '''Создаёт произведения или обновляет описание и жанры существующих,
+    опознавая их по (name, year, category).'''
+    items, errors = validate_items(BulkTitleSerializer, items)
+    check_batch_duplicates(items, errors, title_key, 'non_field_errors',
+                           unique_together_message())
+    categories, genres = resolve_title_slugs(items, errors)
+    raise_if_errors(errors)
+
+    keys = [
+        (item['name'], item['year'], categories[item['category']])
+        for item in items
+    ]
+    existing = find_titles(set(keys))
+    created, changed = [], []
+    for key, item in zip(keys, items):
+        title = existing.get(key)
+        if title is None:
+            created.append(Title(name=key[0], year=key[1],
+                                 category_id=key[2],
+                                 description=item['description']))
+        elif title.description != item['description']:
+            title.description = item['description']
+            changed.append(title)
+    Title.objects.bulk_create(created)
+    Title.objects.bulk_update(changed, ('description',))
+    # Не все базы возвращают id из bulk_create, поэтому перечитываем.
+    titles = find_titles(set(keys))
+    ids = [titles[key].id for key in keys]
+
+    GenreTitle.objects.filter(title_id__in=ids).delete()
+    GenreTitle.objects.bulk_create([
+        GenreTitle(title_id=title_id, genre_id=genres[slug])
+        for title_id, item in zip(ids, items)
+        for slug in dict.fromkeys(item['genre'])
+    ])
+    Title.update_search_vector(Title.objects.filter(id__in=ids))
+    bump_generation_on_commit(*dict.fromkeys(
+        CATALOG_DEPENDENCIES[Title] + CATALOG_DEPENDENCIES[GenreTitle]
+    ))
+    return ids
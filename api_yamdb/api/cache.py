@@ -0,0 +1,46 @@
+import hashlib
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+GENERATION_KEY = 'catalog:{resource}:generation'
+RESPONSE_KEY = 'catalog:{resource}:{generation}:{url}'
+
+
+def get_generation(resource):
+    '''Текущее поколение ресурса; ключи старых поколений просто устаревают.'''
+    key = GENERATION_KEY.format(resource=resource)
+    generation = cache.get(key)
+    if generation is None:
+        # Начальное значение от времени, чтобы после вытеснения счётчика
+        # не совпасть с поколениями, которые ещё лежат в кэше.
+        cache.add(key, time.time_ns(), timeout=None)
+        return cache.get(key)
+    return generation
+
+
+def bump_generation(*resources):
+    for resource in resources:
+        key = GENERATION_KEY.format(resource=resource)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), timeout=None)
+
+
+def bump_generation_on_commit(*resources):
+    '''
+    Сбрасывает поколения после фиксации текущей транзакции: иначе
+    параллельный запрос успел бы закэшировать ещё не зафиксированные
+    данные под новым поколением.
+    '''
+    transaction.on_commit(lambda: bump_generation(*resources))
+
+
+def response_key(resource, generation, url):
+    return RESPONSE_KEY.format(
+        resource=resource,
+        generation=generation,
+        url=hashlib.md5(url.encode()).hexdigest(),
+    )
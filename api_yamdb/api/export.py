@@ -0,0 +1,83 @@
+'''
+Потоковая выгрузка таблиц в CSV или NDJSON в формате static/data,
+чтобы результат можно было загрузить обратно командой import_csv.
+Строки читаются через .iterator(chunk_size=...) (в PostgreSQL —
+серверный курсор), поэтому память не растёт с размером таблицы.
+'''
+import csv
+import json
+from datetime import datetime, timezone
+
+from reviews.models import (Category, Comment, Genre, GenreTitle, Review,
+                            Title, User)
+
+CHUNK_SIZE = 2000
+FORMATS = ('csv', 'ndjson')
+
+# Таблица: (модель, [(колонка файла, поле для values_list)]).
+EXPORTS = {
+    'users': (User, (
+        ('id', 'id'), ('username', 'username'), ('email', 'email'),
+        ('role', 'role'), ('bio', 'bio'), ('first_name', 'first_name'),
+        ('last_name', 'last_name'),
+    )),
+    'category': (Category, (
+        ('id', 'id'), ('name', 'name'), ('slug', 'slug'),
+    )),
+    'genre': (Genre, (
+        ('id', 'id'), ('name', 'name'), ('slug', 'slug'),
+    )),
+    'titles': (Title, (
+        ('id', 'id'), ('name', 'name'), ('year', 'year'),
+        ('category', 'category_id'), ('description', 'description'),
+    )),
+    'genre_title': (GenreTitle, (
+        ('id', 'id'), ('title_id', 'title_id'), ('genre_id', 'genre_id'),
+    )),
+    'review': (Review, (
+        ('id', 'id'), ('title_id', 'title_id'), ('text', 'text'),
+        ('author', 'author_id'), ('score', 'score'),
+        ('pub_date', 'pub_date'),
+    )),
+    'comments': (Comment, (
+        ('id', 'id'), ('review_id', 'review_id'), ('text', 'text'),
+        ('author', 'author_id'), ('pub_date', 'pub_date'),
+    )),
+}
+
+
+class Echo:
+    '''Файлоподобный объект для csv.writer, возвращающий строку.'''
+
+    def write(self, value):
+        return value
+
+
+def format_value(value):
+    if isinstance(value, datetime):
+        value = value.astimezone(timezone.utc).isoformat(
+            timespec='milliseconds'
+        )
+        return value.replace('+00:00', 'Z')
+    return '' if value is None else value
+
+
+def rows(table, chunk_size=CHUNK_SIZE):
+    model, columns = EXPORTS[table]
+    fields = [field for _, field in columns]
+    queryset = model.objects.order_by('id').values_list(*fields)
+    for row in queryset.iterator(chunk_size=chunk_size):
+        yield [format_value(value) for value in row]
+
+
+def export_lines(table, output='csv', chunk_size=CHUNK_SIZE):
+    '''Генератор строк выгрузки вместе с заголовком для CSV.'''
+    headers = [header for header, _ in EXPORTS[table][1]]
+    if output == 'csv':
+        writer = csv.writer(Echo(), lineterminator='\n')
+        yield writer.writerow(headers)
+        for row in rows(table, chunk_size):
+            yield writer.writerow(row)
+        return
+    for row in rows(table, chunk_size):
+        yield json.dumps(dict(zip(headers, row)), ensure_ascii=False) + '\n'
@@ -0,0 +1,99 @@
+'''
+Быстрый путь чтения списков и объектов произведений, отзывов и
+комментариев (FAST_READ_SERIALIZATION, api.mixins.FastReadMixin).
+
+Строки берутся через .values() и превращаются в словари заранее
+написанными функциями вместо полей ModelSerializer, ответ рендерит
+orjson. Результат совпадает с TitleSerializer, ReviewsSerializer,
+CommentsSerializer и JSONRenderer байт в байт, поэтому при изменении
+сериализаторов эти функции нужно менять вместе с ними.
+'''
+from collections import defaultdict
+
+from rest_framework.fields import DateTimeField
+from rest_framework.renderers import JSONRenderer
+from reviews.models import Genre
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# DateTimeField без привязки к сериализатору форматирует так же
+# (ISO 8601, часовой пояс из настроек, Z вместо +00:00).
+format_datetime = DateTimeField().to_representation
+
+TITLE_VALUES = ('id', 'name', 'year', 'rating_sum', 'rating_count',
+                'description', 'category__name', 'category__slug')
+REVIEW_VALUES = ('id', 'text', 'author__username', 'score', 'pub_date',
+                 'comment_count')
+COMMENT_VALUES = ('id', 'text', 'author__username', 'pub_date')
+
+
+def genres_by_title(title_ids):
+    '''Жанры страницы одним запросом, как prefetch_related('genre').'''
+    genres = defaultdict(list)
+    rows = Genre.objects.filter(title__in=title_ids).values_list(
+        'title', 'name', 'slug'
+    )
+    for title_id, name, slug in rows:
+        genres[title_id].append({'name': name, 'slug': slug})
+    return genres
+
+
+def title_dicts(rows):
+    genres = genres_by_title([row['id'] for row in rows])
+    return [{
+        'id': row['id'],
+        'name': row['name'],
+        'year': row['year'],
+        'rating': (int(row['rating_sum'] / row['rating_count'])
+                   if row['rating_count'] else None),
+        'review_count': row['rating_count'],
+        'description': row['description'],
+        'genre': genres.get(row['id'], []),
+        'category': (None if row['category__slug'] is None else {
+            'name': row['category__name'],
+            'slug': row['category__slug'],
+        }),
+    } for row in rows]
+
+
+def review_dicts(rows):
+    return [{
+        'id': row['id'],
+        'text': row['text'],
+        'author': row['author__username'],
+        'score': row['score'],
+        'pub_date': format_datetime(row['pub_date']),
+        'comment_count': row['comment_count'],
+    } for row in rows]
+
+
+def comment_dicts(rows):
+    return [{
+        'id': row['id'],
+        'text': row['text'],
+        'author': row['author__username'],
+        'pub_date': format_datetime(row['pub_date']),
+    } for row in rows]
+
+
+class FastJSONRenderer(JSONRenderer):
+    '''
+    JSONRenderer на orjson для компактного вывода. Без orjson и для
+    вывода с отступами работает как JSONRenderer.
+    '''
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (orjson is None or data is None or self.get_indent(
+                accepted_media_type, renderer_context or {})):
+            return super().render(data, accepted_media_type,
+                                  renderer_context)
+        # Даты и время форматирует encoder_class, как в JSONRenderer.
+        ret = orjson.dumps(data, default=self.encoder_class().default,
+                           option=orjson.OPT_PASSTHROUGH_DATETIME)
+        # Как JSONRenderer: U+2028 и U+2029 экранируются для JavaScript.
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(
+            b'\xe2\x80\xa9', b'\\u2029'
+        )
@@ -0,0 +1,52 @@
+import json
+
+from api.benchmark import build_routes, run_benchmark
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+
+class Command(BaseCommand):
+    help = ('Замеряет p50/p95/p99 задержки и число SQL-запросов для '
+            'чтения, служебных эндпоинтов и повторяемых записей API через '
+            'тестовый клиент Django (без удаления и создания отзывов)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=50,
+                            help='Запросов на маршрут')
+        parser.add_argument('--warmup', type=int, default=3)
+        parser.add_argument('--cached', action='store_true',
+                            help='Не очищать кэш каталога между запросами')
+        parser.add_argument('--output', help='Сохранить результаты в JSON')
+
+    def handle(self, *args, **options):
+        # Записи (signup, комментарии, служебные пользователи) откатываются.
+        with transaction.atomic():
+            results = run_benchmark(
+                build_routes(),
+                requests=options['requests'],
+                warmup=options['warmup'],
+                cached=options['cached'],
+            )
+            transaction.set_rollback(True)
+        self.stdout.write(
+            f'{"маршрут":<16}{"метод":<7}{"код":>5}{"p50 мс":>10}'
+            f'{"p95 мс":>10}{"p99 мс":>10}{"SQL":>6}'
+        )
+        for result in results:
+            self.stdout.write(
+                f'{result.route.name:<16}{result.route.method.upper():<7}'
+                f'{result.status:>5}{result.p50:>10.2f}{result.p95:>10.2f}'
+                f'{result.p99:>10.2f}{result.queries:>6}'
+            )
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                json.dump([
+                    {'route': result.route.name,
+                     'method': result.route.method.upper(),
+                     'status': result.status,
+                     'p50': result.p50,
+                     'p95': result.p95,
+                     'p99': result.p99,
+                     'queries': result.queries}
+                    for result in results
+                ], f, ensure_ascii=False, indent=2)
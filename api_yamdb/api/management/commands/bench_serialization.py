@@ -0,0 +1,91 @@
+import statistics
+import time
+
+from api.fast_read import (COMMENT_VALUES, REVIEW_VALUES, TITLE_VALUES,
+                           FastJSONRenderer, comment_dicts, review_dicts,
+                           title_dicts)
+from api.serializers import (CommentsSerializer, ReviewsSerializer,
+                             TitleSerializer)
+from api.views import TitleViewSet
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+from reviews.dataset import DatasetGenerator
+from reviews.models import Comment, Review
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает ModelSerializer + JSONRenderer с .values() + '
+            'FastJSONRenderer на страницах произведений, отзывов и '
+            'комментариев (сгенерированные данные откатываются)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--titles', type=int, default=200)
+        parser.add_argument('--reviews-per-title', type=int, default=20)
+        parser.add_argument('--comments-per-review', type=int, default=5)
+        parser.add_argument('--page', type=int, default=100,
+                            help='Объектов в замеряемой странице')
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            DatasetGenerator(
+                options['titles'],
+                options['reviews_per_title'],
+                options['comments_per_review'],
+                seed=0,
+            ).generate()
+            results = {
+                name: (self.measure(slow, options['repeat']),
+                       self.measure(fast, options['repeat']))
+                for name, (slow, fast) in self.pages(options['page']).items()
+            }
+            transaction.set_rollback(True)
+        self.stdout.write(
+            f'{"страница":<14}{"DRF мс":>10}{"values мс":>11}{"ускорение":>11}'
+        )
+        for name, ((slow_ms, slow), (fast_ms, fast)) in results.items():
+            if slow != fast:
+                raise CommandError(f'{name}: ответы быстрого пути отличаются')
+            self.stdout.write(f'{name:<14}{slow_ms:>10.2f}{fast_ms:>11.2f}'
+                              f'{slow_ms / fast_ms:>10.1f}x')
+
+    def pages(self, size):
+        '''{страница: (обычный путь, быстрый путь)}, оба отдают байты.'''
+        review = Review.objects.filter(comments__isnull=False).first()
+        if review is None:
+            raise CommandError('Нужны отзывы с комментариями')
+        querysets = {
+            'titles': (TitleViewSet.queryset.order_by('id'),
+                       TITLE_VALUES, title_dicts, TitleSerializer),
+            'reviews': (Review.objects.filter(title_id=review.title_id)
+                        .select_related('author').order_by('id'),
+                        REVIEW_VALUES, review_dicts, ReviewsSerializer),
+            'comments': (Comment.objects.filter(review_id=review.id)
+                         .select_related('author').order_by('id'),
+                         COMMENT_VALUES, comment_dicts, CommentsSerializer),
+        }
+        slow_renderer = JSONRenderer()
+        fast_renderer = FastJSONRenderer()
+        pages = {}
+        for name, (queryset, values, dicts, serializer) in querysets.items():
+            objects = queryset[:size]
+            rows = queryset.prefetch_related(None).values(*values)[:size]
+            pages[name] = (
+                lambda objects=objects, serializer=serializer:
+                    slow_renderer.render(
+                        serializer(list(objects.all()), many=True).data
+                    ),
+                lambda rows=rows, dicts=dicts:
+                    fast_renderer.render(dicts(list(rows.all()))),
+            )
+        return pages
+
+    def measure(self, render, repeat):
+        '''(медиана в мс, результат последнего запуска).'''
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            content = render()
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings), content
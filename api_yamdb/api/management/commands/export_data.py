@@ -0,0 +1,24 @@
+from api.export import CHUNK_SIZE, EXPORTS, FORMATS, export_lines
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = ('Потоково выгружает таблицу в CSV или NDJSON в формате '
+            'static/data')
+
+    def add_arguments(self, parser):
+        parser.add_argument('table', choices=EXPORTS)
+        parser.add_argument('--type', choices=FORMATS, default='csv')
+        parser.add_argument('--output', help='Файл (по умолчанию stdout)')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        lines = export_lines(options['table'], options['type'],
+                             options['chunk_size'])
+        if not options['output']:
+            for line in lines:
+                self.stdout.write(line, ending='')
+            return
+        with open(options['output'], 'w', encoding='utf-8',
+                  newline='') as f:
+            f.writelines(lines)
@@ -0,0 +1,48 @@
+import time
+
+from api.cache import bump_generation
+from django.core.management.base import BaseCommand
+from reviews.counters import COUNTERS, reconcile
+from reviews.models import Title
+
+
+class Command(BaseCommand):
+    help = ('Сверяет рейтинг и гистограмму произведений и comment_count '
+            'отзывов с отзывами и комментариями и исправляет расхождения '
+            'пакетами')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Строк в одной транзакции')
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=0,
+            help='Сверять каждые N секунд (по умолчанию один раз)',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            for model, totals in COUNTERS:
+                self.reconcile(model, totals, options)
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
+
+    def reconcile(self, model, totals, options):
+        name = model._meta.verbose_name_plural
+        checked = fixed = 0
+        for batch, drifted in reconcile(model, totals,
+                                        options['batch_size']):
+            checked += batch
+            fixed += drifted
+            if options['verbosity'] > 1:
+                self.stdout.write(f'{name}: проверено {checked}, '
+                                  f'исправлено {fixed}')
+        if fixed and model is Title:
+            # UPDATE не вызывает сигналов, кэш каталога сбрасывается здесь.
+            bump_generation('titles', 'leaderboards')
+        style = self.style.WARNING if fixed else self.style.SUCCESS
+        self.stdout.write(style(
+            f'{name}: проверено {checked}, исправлено {fixed}'
+        ))
@@ -0,0 +1,33 @@
+import time
+
+from api.cache import bump_generation
+from django.core.management.base import BaseCommand
+from reviews.leaderboards import refresh_leaderboards
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает рейтинги лучших и популярных произведений '
+            'для /api/v1/titles/top/')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=0,
+            help='Пересчитывать каждые N секунд (по умолчанию один раз)',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            started = time.perf_counter()
+            counts = refresh_leaderboards()
+            bump_generation('leaderboards')
+            elapsed = time.perf_counter() - started
+            self.stdout.write(self.style.SUCCESS(
+                ', '.join(f'{board}: {count}'
+                          for board, count in counts.items())
+                + f' ({elapsed:.2f} с)'
+            ))
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
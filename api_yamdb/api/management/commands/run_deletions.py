@@ -0,0 +1,57 @@
+import time
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+from reviews.deletion import delete_pending, next_pending
+
+
+class Command(BaseCommand):
+    help = ('Удаляет скрытые произведения, отзывы и пользователей с '
+            'зависимыми строками пакетами (BACKGROUND_DELETION)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Строк в одной транзакции')
+        parser.add_argument(
+            '--pause',
+            type=float,
+            default=0,
+            help='Пауза между пакетами, секунды (снижает нагрузку на БД)',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5.0,
+            help='Пауза между опросами пустой очереди, секунды',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Удалить все скрытые объекты и завершиться',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            instance = next_pending()
+            if instance is None:
+                if options['once']:
+                    return
+                time.sleep(options['interval'])
+                continue
+            self.delete(instance, options)
+
+    def delete(self, instance, options):
+        label = f'{instance._meta.verbose_name} #{instance.pk}'
+        totals = Counter()
+        for model, deleted in delete_pending(instance,
+                                             options['batch_size']):
+            name = model._meta.verbose_name_plural
+            totals[name] += deleted
+            self.stdout.write(f'{label}: {name} {totals[name]}')
+            if options['pause']:
+                time.sleep(options['pause'])
+        self.stdout.write(self.style.SUCCESS(
+            f'{label} удалён: ' + ', '.join(
+                f'{name} {count}' for name, count in totals.items()
+            )
+        ))
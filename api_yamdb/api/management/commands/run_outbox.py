@@ -0,0 +1,109 @@
+import time
+from datetime import timedelta
+
+from api.models import OutboxEmail
+from django.core.mail import EmailMessage, get_connection
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = 'Отправляет письма из очереди OutboxEmail пакетами с повторами'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=50)
+        parser.add_argument(
+            '--max-attempts',
+            type=int,
+            default=5,
+            help='После стольких неудачных попыток письмо не отправляется',
+        )
+        parser.add_argument(
+            '--backoff',
+            type=int,
+            default=30,
+            help='Базовая задержка повтора, секунды (растёт вдвое)',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=1.0,
+            help='Пауза между опросами пустой очереди, секунды',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Обработать очередь один раз и завершиться',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            processed = self.process_batch(options)
+            if options['once'] and not processed:
+                return
+            if not processed:
+                time.sleep(options['interval'])
+
+    def process_batch(self, options):
+        emails = self.claim(options)
+        if not emails:
+            return 0
+        sent = 0
+        try:
+            # Одна SMTP-сессия на пакет; письма отправляются вне транзакции.
+            with get_connection() as connection:
+                for email in emails:
+                    sent += self.send(email, connection)
+        except Exception as error:
+            # Соединение не открылось: письма повторятся после send_after.
+            OutboxEmail.objects.filter(
+                pk__in=[email.pk for email in emails], sent_at__isnull=True
+            ).update(last_error=str(error))
+        self.stdout.write(f'Отправлено {sent} из {len(emails)}')
+        return len(emails)
+
+    def claim(self, options):
+        '''
+        Забирает пакет в короткой транзакции: попытка засчитывается, а
+        send_after сдвигается на задержку повтора заранее. Другие воркеры
+        эти письма до send_after не возьмут, а после падения процесса
+        неотправленные повторятся без ручного вмешательства.
+        '''
+        now = timezone.now()
+        with transaction.atomic():
+            emails = list(
+                OutboxEmail.objects.select_for_update(skip_locked=True)
+                .filter(sent_at__isnull=True,
+                        send_after__lte=now,
+                        attempts__lt=options['max_attempts'])
+                [:options['batch_size']]
+            )
+            for email in emails:
+                email.attempts += 1
+                email.send_after = now + timedelta(
+                    seconds=options['backoff'] * 2 ** (email.attempts - 1)
+                )
+            OutboxEmail.objects.bulk_update(emails,
+                                            ('attempts', 'send_after'))
+        return emails
+
+    def send(self, email, connection):
+        '''Отправляет письмо и сразу отмечает результат в базе.'''
+        try:
+            EmailMessage(
+                subject=email.subject,
+                body=email.message,
+                from_email=email.from_email,
+                to=[email.recipient],
+                connection=connection,
+            ).send()
+        except Exception as error:
+            OutboxEmail.objects.filter(pk=email.pk).update(
+                last_error=str(error)
+            )
+            return 0
+        OutboxEmail.objects.filter(pk=email.pk).update(
+            sent_at=timezone.now(), last_error=''
+        )
+        return 1
@@ -0,0 +1,232 @@
+import asyncio
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+from asgiref.sync import sync_to_async
+from django.db import connections
+from django.db.backends.signals import connection_created
+from rest_framework.permissions import SAFE_METHODS
+
+from .routers import current_request, pin_to_primary, request_user
+
+# Границы корзин гистограмм времени, миллисекунды.
+TIME_BUCKETS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+
+class Histogram:
+    def __init__(self):
+        self.buckets = [0] * (len(TIME_BUCKETS) + 1)
+        self.total = 0.0
+
+    def add(self, value):
+        for index, bound in enumerate(TIME_BUCKETS):
+            if value <= bound:
+                break
+        else:
+            index = len(TIME_BUCKETS)
+        self.buckets[index] += 1
+        self.total += value
+
+    def as_dict(self):
+        labels = [f'<={bound}' for bound in TIME_BUCKETS] + ['inf']
+        return {'sum': round(self.total, 3),
+                'buckets': dict(zip(labels, self.buckets))}
+
+
+class RouteMetrics:
+    def __init__(self):
+        self.requests = 0
+        self.wall = Histogram()
+        self.db = Histogram()
+        self.queries = 0
+        self.max_queries = 0
+        self.duplicates = 0
+        self.max_duplicates = 0
+
+    def add(self, wall, db, queries, duplicates):
+        self.requests += 1
+        self.wall.add(wall)
+        self.db.add(db)
+        self.queries += queries
+        self.max_queries = max(self.max_queries, queries)
+        self.duplicates += duplicates
+        self.max_duplicates = max(self.max_duplicates, duplicates)
+
+    def as_dict(self):
+        return {
+            'requests': self.requests,
+            'wall_ms': self.wall.as_dict(),
+            'db_ms': self.db.as_dict(),
+            'queries': {'sum': self.queries, 'max': self.max_queries},
+            'duplicate_queries': {'sum': self.duplicates,
+                                  'max': self.max_duplicates},
+        }
+
+
+class MetricsRegistry:
+    '''Метрики по именам маршрутов; у каждого процесса свои.'''
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.routes = {}
+
+    def record(self, route, wall, db, queries, duplicates):
+        with self.lock:
+            metrics = self.routes.setdefault(route, RouteMetrics())
+            metrics.add(wall, db, queries, duplicates)
+
+    def snapshot(self):
+        with self.lock:
+            return {route: metrics.as_dict()
+                    for route, metrics in sorted(self.routes.items())}
+
+    def reset(self):
+        with self.lock:
+            self.routes.clear()
+
+
+registry = MetricsRegistry()
+
+# QueryRecorder текущего запроса. Контекст копируется в потоки
+# sync_to_async, поэтому под ASGI запросы из пула тоже учитываются.
+current_recorder = ContextVar('current_recorder', default=None)
+
+
+class QueryRecorder:
+    '''Обёртка execute_wrapper: считает время и повторы запросов.'''
+
+    def __init__(self):
+        self.duration = 0.0
+        self.statements = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.statements[(sql, repr(params))] += 1
+
+    @property
+    def count(self):
+        return sum(self.statements.values())
+
+    @property
+    def duplicates(self):
+        return sum(total - 1 for total in self.statements.values())
+
+
+def record_query(execute, sql, params, many, context):
+    recorder = current_recorder.get()
+    if recorder is None:
+        return execute(sql, params, many, context)
+    return recorder(execute, sql, params, many, context)
+
+
+def install_recorder(connection, **kwargs):
+    '''Постоянная обёртка соединения; без активного запроса ничего не
+    делает.'''
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+class RequestMetricsMiddleware:
+    '''
+    Замеряет время запроса, время в базе, число запросов и их повторов,
+    добавляет заголовок Server-Timing и копит гистограммы по имени
+    маршрута (titles-list, reviews-detail, ...). Работает без DEBUG.
+    Под ASGI обрабатывает запрос асинхронно и не занимает общий поток
+    синхронного кода.
+    '''
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        # Соединения у каждого потока свои, в том числе у потоков пула
+        # асинхронных представлений.
+        connection_created.connect(install_recorder,
+                                   dispatch_uid='request_metrics')
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        for connection in connections.all():
+            install_recorder(connection)
+        recorder = QueryRecorder()
+        token = current_recorder.set(recorder)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            current_recorder.reset(token)
+        return self.finish(request, response, recorder, started)
+
+    async def __acall__(self, request):
+        recorder = QueryRecorder()
+        token = current_recorder.set(recorder)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_recorder.reset(token)
+        return self.finish(request, response, recorder, started)
+
+    def finish(self, request, response, recorder, started):
+        wall = (time.perf_counter() - started) * 1000
+        db = recorder.duration * 1000
+        match = request.resolver_match
+        route = match.url_name if match and match.url_name else 'unresolved'
+        registry.record(route, wall, db, recorder.count, recorder.duplicates)
+        response['Server-Timing'] = (
+            f'total;dur={wall:.1f}, '
+            f'db;dur={db:.1f};desc="{recorder.count} queries, '
+            f'{recorder.duplicates} duplicates"'
+        )
+        return response
+
+
+class ReplicaRoutingMiddleware:
+    '''
+    Делает запрос видимым для ReplicaRouter и после записи прикрепляет
+    пользователя к основной базе (read-your-writes). Под ASGI работает
+    асинхронно: ContextVar с запросом копируется в потоки sync_to_async.
+    '''
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        token = current_request.set(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_request.reset(token)
+        self.pin_writer(request)
+        return response
+
+    async def __acall__(self, request):
+        token = current_request.set(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_request.reset(token)
+        if request.method not in SAFE_METHODS:
+            await sync_to_async(self.pin_writer)(request)
+        return response
+
+    def pin_writer(self, request):
+        if request.method not in SAFE_METHODS:
+            user = request_user(request)
+            if user is not None:
+                pin_to_primary(user)
@@ -1,4 +1,18 @@
-from rest_framework import mixins, viewsets
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.http import parse_etags
+from rest_framework import mixins, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.generics import get_object_or_404
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from reviews.deletion import hide_for_deletion
+
+from .bulk import BulkError, upsert_slugs
+from .cache import get_generation, response_key
+from .fast_read import FastJSONRenderer
 
 
 class CreateDeleteListViewSet(mixins.CreateModelMixin,
@@ -6,3 +20,201 @@ class CreateDeleteListViewSet(mixins.CreateModelMixin,
                               mixins.ListModelMixin,
                               viewsets.GenericViewSet):
     pass
+
+
+class CatalogCacheMixin:
+    '''
+    Кэширует ответы list по поколению ресурса cache_resource и
+    отвечает 304 на If-None-Match с актуальным ETag, если для адреса
+    есть закэшированный ответ 200. Ключ включает хост: в ответе
+    абсолютные ссылки next и previous.
+    '''
+    cache_resource = None
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def cached_response(self, handler, request, *args, resource=None,
+                        **kwargs):
+        resource = resource or self.cache_resource
+        generation = get_generation(resource)
+        etag = f'"{resource}-{generation}"'
+        key = response_key(resource, generation,
+                           request.build_absolute_uri())
+        data = cache.get(key)
+        if data is None:
+            # Без ответа в кэше 304 не отдаётся: адреса может не быть.
+            response = handler(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            cache.set(key, response.data, settings.CATALOG_CACHE_TIMEOUT)
+        else:
+            if_none_match = request.headers.get('If-None-Match', '')
+            if etag in parse_etags(if_none_match) or if_none_match == '*':
+                return Response(status=status.HTTP_304_NOT_MODIFIED,
+                                headers={'ETag': etag})
+            response = Response(data)
+        response['ETag'] = etag
+        return response
+
+
+class BulkSlugUpsertMixin:
+    '''POST .../bulk/ со списком {name, slug}: создание или
+    переименование объектов по slug одним пакетом.'''
+
+    @action(detail=False, methods=['POST'])
+    def bulk(self, request):
+        try:
+            objects = upsert_slugs(self.queryset.model, request.data)
+        except BulkError as error:
+            return Response(error.errors, status=status.HTTP_400_BAD_REQUEST)
+        serializer = self.get_serializer(objects, many=True)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+
+def split_param(value):
+    return [name.strip() for name in value.split(',') if name.strip()]
+
+
+def narrow_queryset(queryset, paths):
+    '''
+    Оставляет в запросе только пути ORM из paths: поля модели идут в
+    .only(), поля через внешний ключ (category__slug) — ещё и в
+    select_related, связи многие-ко-многим и обратные — в
+    prefetch_related. Остальные соединения и предзагрузки убираются.
+    '''
+    meta = queryset.model._meta
+    only, select, prefetch = {meta.pk.name}, set(), set()
+    for path in paths:
+        name, _, rest = path.partition('__')
+        field = meta.get_field(name)
+        if field.many_to_many or field.one_to_many:
+            prefetch.add(name)
+            continue
+        only.add(path)
+        if rest:
+            only.add(name)
+            select.add(name)
+    queryset = queryset.select_related(None).prefetch_related(None)
+    if select:
+        queryset = queryset.select_related(*select)
+    if prefetch:
+        queryset = queryset.prefetch_related(*prefetch)
+    return queryset.only(*only)
+
+
+class SparseFieldsMixin:
+    '''
+    ?fields=a,b — в ответе только перечисленные поля, ?omit=a,b — все,
+    кроме перечисленных (для list и retrieve). sparse_fields задаёт для
+    поля сериализатора нужные ему пути ORM, по ним сужается SQL (см.
+    narrow_queryset); без sparse_fields сокращается только ответ.
+    '''
+    sparse_fields = None
+    sparse_actions = ('list', 'retrieve')
+
+    def get_requested_fields(self):
+        if not hasattr(self, '_requested_fields'):
+            self._requested_fields = self.parse_requested_fields()
+        return self._requested_fields
+
+    def parse_requested_fields(self):
+        params = self.request.query_params
+        if (self.action not in self.sparse_actions
+                or ('fields' not in params and 'omit' not in params)):
+            return None
+        available = list(self.get_serializer_class()(
+            context=self.get_serializer_context()
+        ).fields)
+        fields = split_param(params.get('fields', '')) or available
+        omit = split_param(params.get('omit', ''))
+        unknown = (set(fields) | set(omit)) - set(available)
+        if unknown:
+            raise ValidationError({'fields': [
+                f'Неизвестные поля: {", ".join(sorted(unknown))}.'
+            ]})
+        return [name for name in available
+                if name in fields and name not in omit]
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        fields = self.get_requested_fields()
+        if fields is not None:
+            target = getattr(serializer, 'child', serializer)
+            for name in list(target.fields):
+                if name not in fields:
+                    target.fields.pop(name)
+        return serializer
+
+    def filter_queryset(self, queryset):
+        # Не get_queryset: его переопределяют сами представления.
+        queryset = super().filter_queryset(queryset)
+        fields = self.get_requested_fields()
+        if fields is None or self.sparse_fields is None:
+            return queryset
+        return narrow_queryset(queryset, [
+            path for name in fields for path in self.sparse_fields[name]
+        ])
+
+
+class FastReadMixin:
+    '''
+    Быстрый путь list и retrieve при settings.FAST_READ_SERIALIZATION:
+    строки fast_values из .values() превращает в словари fast_dicts
+    (api.fast_read), ответ рендерит FastJSONRenderer. Фильтры, пагинация
+    и проверка прав те же. С ?fields=/?omit= (SparseFieldsMixin) ответ
+    строит обычный сериализатор.
+    '''
+    fast_values = ()
+    fast_dicts = None
+    fast_actions = ('list', 'retrieve')
+
+    def use_fast_path(self):
+        return (settings.FAST_READ_SERIALIZATION
+                and self.action in self.fast_actions)
+
+    def get_renderers(self):
+        renderers = super().get_renderers()
+        if not self.use_fast_path():
+            return renderers
+        return [FastJSONRenderer() if type(renderer) is JSONRenderer
+                else renderer for renderer in renderers]
+
+    def get_fast_queryset(self):
+        return self.filter_queryset(
+            self.get_queryset()
+        ).prefetch_related(None).values(*self.fast_values)
+
+    def list(self, request, *args, **kwargs):
+        if not self.use_fast_path() or self.get_requested_fields():
+            return super().list(request, *args, **kwargs)
+        queryset = self.get_fast_queryset()
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(self.fast_dicts(page))
+        return Response(self.fast_dicts(list(queryset)))
+
+    def retrieve(self, request, *args, **kwargs):
+        if not self.use_fast_path() or self.get_requested_fields():
+            return super().retrieve(request, *args, **kwargs)
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        row = get_object_or_404(self.get_fast_queryset(), **{
+            self.lookup_field: self.kwargs[lookup_url_kwarg]
+        })
+        self.check_object_permissions(request, row)
+        return Response(self.fast_dicts([row])[0])
+
+
+class BackgroundDeleteMixin:
+    '''
+    При settings.BACKGROUND_DELETION destroy только скрывает объект, а
+    зависимые строки пакетами удаляет команда run_deletions
+    (reviews.deletion).
+    '''
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        if settings.BACKGROUND_DELETION:
+            hide_for_deletion(instance)
+        else:
+            instance.delete()
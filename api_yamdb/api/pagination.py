@@ -0,0 +1,226 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.db import connections
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (Cursor, CursorPagination,
+                                       LimitOffsetPagination)
+
+ESTIMATE_KEY = 'estimate:{alias}:{digest}'
+TABLE_ROWS_KEY = 'estimate:{alias}:{table}:rows'
+
+
+def table_rows(connection, table):
+    '''Размер таблицы по статистике последнего ANALYZE (pg_class).'''
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT reltuples FROM pg_class WHERE oid = %s::regclass', [table]
+        )
+        return int(cursor.fetchone()[0])
+
+
+def explain_rows(connection, sql, params):
+    '''Оценка числа строк запроса из EXPLAIN без его выполнения.'''
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+def estimate_count(queryset):
+    '''
+    Число строк запроса по статистике планировщика PostgreSQL или None,
+    если оценить нельзя. Пока вся таблица меньше
+    APPROXIMATE_COUNT_THRESHOLD, выборка тоже меньше, и вместо EXPLAIN
+    отдаётся размер таблицы. Размер таблицы и оценки запросов хранятся
+    в кэше APPROXIMATE_COUNT_CACHE_TIMEOUT секунд: статистика меняется
+    только с ANALYZE, а EXPLAIN на каждой странице стоит лишнего
+    обращения к базе.
+    '''
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    timeout = settings.APPROXIMATE_COUNT_CACHE_TIMEOUT
+    key = TABLE_ROWS_KEY.format(alias=queryset.db,
+                                table=queryset.model._meta.db_table)
+    rows = cache.get(key)
+    if rows is None:
+        rows = table_rows(connection, queryset.model._meta.db_table)
+        cache.set(key, rows, timeout)
+    if rows < settings.APPROXIMATE_COUNT_THRESHOLD:
+        return rows
+    try:
+        sql, params = queryset.order_by().query.sql_with_params()
+    except EmptyResultSet:
+        # Заведомо пустой фильтр вроде pk__in=[]: SQL не строится.
+        return 0
+    digest = hashlib.md5(f'{sql}{params!r}'.encode()).hexdigest()
+    key = ESTIMATE_KEY.format(alias=queryset.db, digest=digest)
+    estimate = cache.get(key)
+    if estimate is None:
+        estimate = explain_rows(connection, sql, params)
+        cache.set(key, estimate, timeout)
+    return estimate
+
+
+class PubDateCursorPagination(CursorPagination):
+    '''
+    Постраничный вывод по курсору в порядке (pub_date, id). Штатный курсор
+    DRF запоминает только pub_date, а записи с той же датой пропускает
+    смещением, которое не может превышать offset_cutoff. Здесь позиция
+    хранит обе части ключа: страница выбирается условием
+    pub_date <= p AND (pub_date < p OR pub_date = p AND id < i), то есть
+    (pub_date, id) < (p, i), диапазоном по индексу (…, pub_date, id) без
+    OFFSET при любом числе совпадающих дат.
+    '''
+    ordering = ('-pub_date', '-id')
+    reverse_ordering = ('pub_date', 'id')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+        self.base_url = request.build_absolute_uri()
+        self.cursor = self.decode_cursor(request)
+        reverse = self.cursor is not None and self.cursor.reverse
+        position = self.cursor and self.cursor.position
+        queryset = queryset.order_by(
+            *(self.reverse_ordering if reverse else self.ordering)
+        )
+        if position is not None:
+            queryset = queryset.filter(self.keyset(position, reverse))
+        results = list(queryset[:self.page_size + 1])
+        self.page = results[:self.page_size]
+        has_more = len(results) > self.page_size
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = position is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+    def keyset(self, position, reverse):
+        '''Условие «строго после позиции» в направлении обхода.'''
+        try:
+            pub_date, pk = position.rsplit(' ', 1)
+            pub_date, pk = parse_datetime(pub_date), int(pk)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+        if pub_date is None:
+            raise NotFound(self.invalid_cursor_message)
+        lookup = 'gt' if reverse else 'lt'
+        # Лишнее на вид pub_date <= p (>= при обратном обходе) даёт
+        # PostgreSQL границу диапазона по индексу: без него OR читается
+        # с самой новой строки и фильтруется.
+        return Q(**{f'pub_date__{lookup}e': pub_date}) & (
+            Q(**{f'pub_date__{lookup}': pub_date})
+            | Q(pub_date=pub_date, **{f'id__{lookup}': pk})
+        )
+
+    def _get_position_from_instance(self, instance, ordering):
+        if isinstance(instance, dict):
+            pub_date, pk = instance['pub_date'], instance['id']
+        else:
+            pub_date, pk = instance.pub_date, instance.id
+        return f'{pub_date.isoformat()} {pk}'
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        if self.page:
+            position = self._get_position_from_instance(self.page[-1], None)
+        else:
+            position = self.cursor.position
+        return self.encode_cursor(
+            Cursor(offset=0, reverse=False, position=position)
+        )
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if self.page:
+            position = self._get_position_from_instance(self.page[0], None)
+        else:
+            position = self.cursor.position
+        return self.encode_cursor(
+            Cursor(offset=0, reverse=True, position=position)
+        )
+
+
+class ApproximateCountPagination(LimitOffsetPagination):
+    '''
+    limit/offset, где COUNT(*) заменяется оценкой планировщика, если она
+    не меньше APPROXIMATE_COUNT_THRESHOLD: на больших таблицах точный
+    подсчёт дороже самой страницы. Такой ответ помечен полем
+    count_approximate. Небольшие выборки считаются точно, как раньше.
+    '''
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count_approximate = False
+        estimate = self.estimate_count(queryset)
+        if estimate is None or estimate < settings.APPROXIMATE_COUNT_THRESHOLD:
+            return super().paginate_queryset(queryset, request, view)
+        self.limit = self.get_limit(request)
+        if self.limit is None:
+            return None
+        self.offset = self.get_offset(request)
+        self.request = request
+        if self.template is not None:
+            self.display_page_controls = True
+        # Оценка может быть меньше offset, поэтому страница читается всегда.
+        page = list(queryset[self.offset:self.offset + self.limit])
+        self.count_approximate = True
+        if len(page) == self.limit:
+            # Ссылка next нужна, пока страницы заполнены целиком.
+            self.count = max(estimate, self.offset + self.limit + 1)
+        elif page or not self.offset:
+            # Последняя страница: число строк известно точно.
+            self.count = self.offset + len(page)
+            self.count_approximate = False
+        else:
+            self.count = min(estimate, self.offset)
+        return page
+
+    def estimate_count(self, queryset):
+        try:
+            return estimate_count(queryset)
+        except AttributeError:
+            # Список вместо QuerySet.
+            return None
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        if self.count_approximate:
+            response.data['count_approximate'] = True
+        return response
+
+
+class LimitOffsetOrCursorPagination(ApproximateCountPagination):
+    '''
+    По умолчанию limit/offset, а при наличии параметра cursor
+    (в том числе пустого, для первой страницы) — курсорная пагинация
+    без COUNT(*) и без сканирования пропускаемых строк.
+    '''
+    cursor_query_param = 'cursor'
+    cursor_pagination_class = PubDateCursorPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.cursor_query_param not in request.query_params:
+            self.cursor_paginator = None
+            return super().paginate_queryset(queryset, request, view)
+        self.cursor_paginator = self.cursor_pagination_class()
+        self.cursor_paginator.page_size = self.get_limit(request)
+        return self.cursor_paginator.paginate_queryset(
+            queryset, request, view
+        )
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
@@ -28,7 +28,7 @@ class IsAuthorOrModer(permissions.BasePermission):
 
     def has_object_permission(self, request, view, obj):
         return (request.method in permissions.SAFE_METHODS
-                or obj.author == request.user
+                or obj.author_id == request.user.id
                 or (request.user.is_authenticated
                     and (request.user.there_is_admin
                          or request.user.there_is_moderator)
@@ -0,0 +1,77 @@
+'''
+Чтение с реплики (алиас replica в DATABASES, включается переменными
+окружения DB_REPLICA_*). Реплика используется только для запросов
+безопасными методами внутри HTTP-запроса; запись, управляющие команды
+и воркеры работают с основной базой.
+
+Чтобы пользователь сразу видел свои изменения, после записи он
+«прикрепляется» к основной базе на REPLICA_PIN_SECONDS — дольше
+типичного отставания реплики. Отметка хранится в кэше, поэтому с
+репликой settings требуют общего для процессов бэкенда кэша.
+'''
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils.functional import SimpleLazyObject
+from rest_framework.permissions import SAFE_METHODS
+
+REPLICA_DB_ALIAS = 'replica'
+PIN_KEY = 'replica:pin:{user_id}'
+
+current_request = ContextVar('current_request', default=None)
+
+
+def pin_to_primary(user):
+    cache.set(PIN_KEY.format(user_id=user.id), True,
+              settings.REPLICA_PIN_SECONDS)
+
+
+def is_pinned(user):
+    return cache.get(PIN_KEY.format(user_id=user.id), False)
+
+
+def request_user(request):
+    '''Пользователь, если его уже определила аутентификация DRF.'''
+    user = request.__dict__.get('user')
+    # Ленивый пользователь AuthenticationMiddleware при вычислении
+    # сам обратился бы к базе.
+    if user is None or isinstance(user, SimpleLazyObject):
+        return None
+    return user if user.is_authenticated else None
+
+
+def reads_from_replica(request):
+    if request is None or request.method not in SAFE_METHODS:
+        return False
+    if hasattr(request, '_replica_allowed'):
+        return request._replica_allowed
+    user = request_user(request)
+    if user is None:
+        return True
+    request._replica_allowed = not is_pinned(user)
+    return request._replica_allowed
+
+
+class ReplicaRouter:
+    '''
+    Чтение внутри безопасного запроса — с реплики, всё остальное — с
+    основной базы. Без алиаса replica роутер ничего не меняет.
+    '''
+
+    def db_for_read(self, model, **hints):
+        if REPLICA_DB_ALIAS not in connections.databases:
+            return None
+        if (not connections[DEFAULT_DB_ALIAS].in_atomic_block
+                and reads_from_replica(current_request.get())):
+            return REPLICA_DB_ALIAS
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        # Явно: иначе объект, прочитанный с реплики, сохранялся бы туда же.
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # На реплике те же данные, что и в основной базе.
+        return True
@@ -1,7 +1,9 @@
 from django.core.validators import RegexValidator
 from rest_framework import serializers
 from rest_framework.validators import UniqueTogetherValidator
-from reviews.models import Category, Comment, Genre, Review, Title, User
+from reviews.models import (Category, Comment, Genre, Review, Title,
+                            TitleRanking, User)
+from reviews.validators import year_validator
 
 
 class SerializerForUsers(serializers.ModelSerializer):
@@ -110,14 +112,42 @@ class GenreSerializer(serializers.ModelSerializer):
 class TitleSerializer(serializers.ModelSerializer):
     genre = GenreSerializer(many=True, required=True)
     category = CategorySerializer(many=False, read_only=True)
-    rating = serializers.IntegerField()
+    rating = serializers.IntegerField(read_only=True)
+    # Каждый отзыв содержит оценку, поэтому число отзывов — rating_count.
+    review_count = serializers.IntegerField(source='rating_count',
+                                            read_only=True)
 
     class Meta:
         model = Title
-        fields = ('id', 'name', 'year', 'rating',
+        fields = ('id', 'name', 'year', 'rating', 'review_count',
                   'description', 'genre', 'category')
 
 
+class TitleStatsSerializer(serializers.ModelSerializer):
+    '''Число оценок, средняя и гистограмма: histogram[i] — число
+    отзывов с оценкой i + 1.'''
+    count = serializers.IntegerField(source='rating_count')
+    mean = serializers.SerializerMethodField()
+    histogram = serializers.ListField(child=serializers.IntegerField(),
+                                      source='score_histogram')
+
+    class Meta:
+        model = Title
+        fields = ('id', 'count', 'mean', 'histogram')
+
+    def get_mean(self, title):
+        rating = title.rating
+        return None if rating is None else round(rating, 2)
+
+
+class TitleRankingSerializer(serializers.ModelSerializer):
+    title = TitleSerializer(read_only=True)
+
+    class Meta:
+        model = TitleRanking
+        fields = ('position', 'score', 'title')
+
+
 class TitleCreateSerializer(serializers.ModelSerializer):
     genre = serializers.SlugRelatedField(
         slug_field='slug',
@@ -153,18 +183,9 @@ class ReviewsSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Review
-        fields = ('id', 'text', 'author', 'score', 'pub_date')
-
-    def validate(self, data):
-        if self.context.get('request').method != 'POST':
-            return data
-        reviewer = self.context.get('request').user
-        title_id = self.context.get('view').kwargs['title_id']
-        if Review.objects.filter(author=reviewer, title__id=title_id).exists():
-            raise serializers.ValidationError(
-                'Оставлять отзыв на одно произведение дважды запрещено!'
-            )
-        return data
+        fields = ('id', 'text', 'author', 'score', 'pub_date',
+                  'comment_count')
+        read_only_fields = ('comment_count',)
 
 
 class CommentsSerializer(serializers.ModelSerializer):
@@ -176,3 +197,23 @@ class CommentsSerializer(serializers.ModelSerializer):
     class Meta:
         model = Comment
         fields = ('id', 'text', 'author', 'pub_date',)
+
+
+class BulkSlugSerializer(serializers.Serializer):
+    '''Элемент пакета категорий или жанров; уникальность проверяется
+    для всего пакета сразу в api.bulk.'''
+    name = serializers.CharField(max_length=200)
+    slug = serializers.SlugField(max_length=50)
+
+
+class BulkTitleSerializer(serializers.Serializer):
+    '''Элемент пакета произведений; slug-и жанров и категории
+    разрешаются для всего пакета сразу в api.bulk.'''
+    name = serializers.CharField(max_length=256)
+    year = serializers.IntegerField(min_value=0,
+                                    validators=(year_validator,))
+    description = serializers.CharField(required=False, allow_blank=True,
+                                        default='')
+    genre = serializers.ListField(child=serializers.SlugField(),
+                                  allow_empty=False)
+    category = serializers.SlugField()
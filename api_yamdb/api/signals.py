@@ -0,0 +1,54 @@
+from django.core.signals import request_started
+from django.db import connections
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from reviews.models import Category, Genre, GenreTitle, Review, Title, User
+
+from .authentication import forget_user, remember_user_state
+from .cache import bump_generation_on_commit
+
+# Ресурсы, в ответах которых отображается изменённая модель.
+CATALOG_DEPENDENCIES = {
+    Category: ('categories', 'titles', 'leaderboards'),
+    Genre: ('genres', 'titles', 'leaderboards'),
+    GenreTitle: ('titles', 'leaderboards'),
+    Title: ('titles', 'leaderboards'),
+    Review: ('titles', 'leaderboards'),
+}
+
+
+def invalidate_catalog_cache(sender, **kwargs):
+    bump_generation_on_commit(*CATALOG_DEPENDENCIES[sender])
+
+
+# Подписка только на нужные модели: обработчик без sender отключил бы
+# быстрое удаление (fast delete) у всех остальных моделей.
+for model in CATALOG_DEPENDENCIES:
+    post_save.connect(invalidate_catalog_cache, sender=model)
+    post_delete.connect(invalidate_catalog_cache, sender=model)
+
+
+@receiver(post_save, sender=User)
+def refresh_user_state(sender, instance, **kwargs):
+    remember_user_state(instance)
+
+
+@receiver(post_delete, sender=User)
+def drop_user_state(sender, instance, **kwargs):
+    forget_user(instance.id)
+
+
+@receiver(request_started)
+def check_connections(**kwargs):
+    '''
+    Закрывает неработающие постоянные соединения (CONN_HEALTH_CHECKS)
+    в начале запроса: close_old_connections в Django 3.2 проверяет
+    соединение только после ошибки, и первый запрос после перезапуска
+    базы упал бы. Новое соединение откроется при первом обращении.
+    '''
+    for connection in connections.all():
+        if (connection.connection is not None
+                and connection.settings_dict.get('CONN_HEALTH_CHECKS')
+                and not connection.in_atomic_block
+                and not connection.is_usable()):
+            connection.close()
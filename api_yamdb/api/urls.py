@@ -1,9 +1,9 @@
 from django.urls import include, path
 from rest_framework import routers
 
-from .views import (CategoryViewSet, CommentsViewSet, GenreViewSet,
+from .views import (CategoryViewSet, CommentsViewSet, ExportView, GenreViewSet,
                     ReviewsViewSet, TitleViewSet, UserViewSet, get_jwt_token,
-                    signup)
+                    request_metrics, signup)
 
 router = routers.DefaultRouter()
 router.register('users', UserViewSet, basename='users')
@@ -21,6 +21,8 @@ urlpatterns = [
     path('v1/', include(router.urls)),
     path('v1/auth/signup/', signup, name='signup'),
     path('v1/auth/token/', get_jwt_token, name='login'),
+    path('v1/metrics/', request_metrics, name='metrics'),
+    path('v1/export/<str:table>/', ExportView.as_view(), name='export'),
     path('v1/', include('djoser.urls')),  # Работа с пользователями
     path('v1/', include('djoser.urls.jwt')),  # Работа с jwt токенами
 ]
@@ -1,28 +1,43 @@
+from django.conf import settings
 from django.contrib.auth.tokens import default_token_generator
-from django.core.mail import send_mail
-from django.db.models import Avg
+from django.db import transaction
 from django.db.utils import IntegrityError
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from rest_framework import filters, status, viewsets
 from rest_framework.decorators import action, api_view, permission_classes
-from rest_framework.exceptions import ValidationError
-from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.negotiation import BaseContentNegotiation
 from rest_framework.permissions import (AllowAny, IsAuthenticated,
                                         IsAuthenticatedOrReadOnly)
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import AccessToken
+from rest_framework.settings import api_settings
+from rest_framework.views import APIView
 from reviews.filters import TitleFilterSet
-from reviews.models import Category, Genre, Review, Title, User
+from reviews.models import (SCORES, Category, Comment, Genre, Review, Title,
+                            TitleRanking, User, histogram_field)
 
 from api_yamdb.settings import ADMIN_EMAIL
 
-from .mixins import CreateDeleteListViewSet
+from .authentication import token_for_user
+from .bulk import BulkError, upsert_titles
+from .export import EXPORTS, FORMATS, export_lines
+from .fast_read import (COMMENT_VALUES, REVIEW_VALUES, TITLE_VALUES,
+                        comment_dicts, review_dicts, title_dicts)
+from .middleware import registry as metrics_registry
+from .mixins import (BackgroundDeleteMixin, BulkSlugUpsertMixin,
+                     CatalogCacheMixin, CreateDeleteListViewSet, FastReadMixin,
+                     SparseFieldsMixin)
+from .models import OutboxEmail
+from .pagination import (ApproximateCountPagination,
+                         LimitOffsetOrCursorPagination)
 from .permissions import Admin, AdminOrReadOnly, IsAuthorOrModer
 from .serializers import (CategorySerializer, CommentsSerializer,
                           GenreSerializer, ReviewsSerializer,
                           SerializerForAdminUser, SerializerForSignUp,
                           SerializerForToken, SerializerForUsers,
-                          TitleCreateSerializer, TitleSerializer)
+                          TitleCreateSerializer, TitleRankingSerializer,
+                          TitleSerializer, TitleStatsSerializer)
 
 
 @api_view(["POST"])
@@ -31,22 +46,62 @@ def signup(request):
     serializer = SerializerForSignUp(data=request.data)
     serializer.is_valid(raise_exception=True)
     try:
-        user, create = User.objects.get_or_create(
-            **serializer.validated_data
-        )
+        with transaction.atomic():
+            user, create = User.objects.get_or_create(
+                **serializer.validated_data
+            )
+            confirmation_code = default_token_generator.make_token(user)
+            OutboxEmail.objects.create(
+                subject="Регистрация",
+                message=f"Код подтверждения: {confirmation_code}",
+                from_email=ADMIN_EMAIL,
+                recipient=user.email
+            )
     except IntegrityError:
         raise ValidationError("Неверное имя пользователя или email")
-    confirmation_code = default_token_generator.make_token(user)
-    send_mail(
-        subject="Регистрация",
-        message=f"Код подтверждения: {confirmation_code}",
-        from_email=ADMIN_EMAIL,
-        recipient_list=[user.email]
-    )
 
     return Response(serializer.data, status=status.HTTP_200_OK)
 
 
+@api_view(["GET"])
+@permission_classes([Admin])
+def request_metrics(request):
+    '''Гистограммы RequestMetricsMiddleware текущего процесса.'''
+    return Response({
+        'enabled': settings.REQUEST_METRICS,
+        'routes': metrics_registry.snapshot(),
+    })
+
+
+class IgnoreClientContentNegotiation(BaseContentNegotiation):
+    '''Выгрузка сама выбирает формат, заголовок Accept не учитывается.'''
+
+    def select_parser(self, request, parsers):
+        return parsers[0]
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        return renderers[0], renderers[0].media_type
+
+
+class ExportView(APIView):
+    '''Потоковая выгрузка таблицы: /export/<table>/?type=csv|ndjson'''
+    permission_classes = (Admin,)
+    content_negotiation_class = IgnoreClientContentNegotiation
+
+    def get(self, request, table):
+        output = request.query_params.get('type', 'csv')
+        if table not in EXPORTS or output not in FORMATS:
+            raise NotFound()
+        content_type = ('text/csv; charset=utf-8' if output == 'csv'
+                        else 'application/x-ndjson; charset=utf-8')
+        response = StreamingHttpResponse(export_lines(table, output),
+                                         content_type=content_type)
+        response['Content-Disposition'] = (
+            f'attachment; filename="{table}.{output}"'
+        )
+        return response
+
+
 @api_view(["POST"])
 def get_jwt_token(request):
     serializer = SerializerForToken(data=request.data)
@@ -58,12 +113,13 @@ def get_jwt_token(request):
     if default_token_generator.check_token(
             user, serializer.validated_data.get("confirmation_code")
     ):
-        token = AccessToken.for_user(user)
+        token = token_for_user(user)
         return Response({"token": str(token)}, status=status.HTTP_200_OK)
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(BackgroundDeleteMixin, SparseFieldsMixin,
+                  viewsets.ModelViewSet):
     queryset = User.objects.all()
     serializer_class = SerializerForUsers
     permission_classes = [Admin]
@@ -93,17 +149,21 @@ class UserViewSet(viewsets.ModelViewSet):
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
-class CategoryViewSet(CreateDeleteListViewSet):
+class CategoryViewSet(CatalogCacheMixin, BulkSlugUpsertMixin,
+                      SparseFieldsMixin, CreateDeleteListViewSet):
+    cache_resource = 'categories'
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     permission_classes = (AdminOrReadOnly,)
-    pagination_class = LimitOffsetPagination
+    pagination_class = ApproximateCountPagination
     filter_backends = (filters.SearchFilter,)
     search_fields = ('name',)
     lookup_field = 'slug'
 
 
-class GenreViewSet(CreateDeleteListViewSet):
+class GenreViewSet(CatalogCacheMixin, BulkSlugUpsertMixin,
+                   SparseFieldsMixin, CreateDeleteListViewSet):
+    cache_resource = 'genres'
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
     permission_classes = (AdminOrReadOnly,)
@@ -113,48 +173,175 @@ class GenreViewSet(CreateDeleteListViewSet):
     ordering_fields = ['id']
 
 
-class TitleViewSet(viewsets.ModelViewSet):
-    queryset = Title.objects.all().annotate(
-        rating=Avg('reviews__score')
-    )
+class TitleViewSet(CatalogCacheMixin, BackgroundDeleteMixin, FastReadMixin,
+                   SparseFieldsMixin, viewsets.ModelViewSet):
+    cache_resource = 'titles'
+    fast_values = TITLE_VALUES
+    fast_dicts = staticmethod(title_dicts)
+    queryset = Title.objects.select_related(
+        'category'
+    ).prefetch_related('genre').defer('search_vector')
+    sparse_fields = {
+        'id': ('id',),
+        'name': ('name',),
+        'year': ('year',),
+        'rating': ('rating_sum', 'rating_count'),
+        'review_count': ('rating_count',),
+        'description': ('description',),
+        'genre': ('genre',),
+        'category': ('category__name', 'category__slug'),
+    }
     permission_classes = (IsAuthenticatedOrReadOnly, AdminOrReadOnly,)
     filterset_class = TitleFilterSet
     ordering_fields = ['name']
 
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request,
+                                    *args, **kwargs)
+
+    @action(detail=False, methods=['GET'])
+    def top(self, request):
+        '''?board=top|trending&limit=N: готовый рейтинг из TitleRanking.'''
+        return self.cached_response(self.get_top, request,
+                                    resource='leaderboards')
+
+    def get_top(self, request):
+        board = request.query_params.get('board', TitleRanking.TOP)
+        if board not in dict(TitleRanking.BOARDS):
+            raise ValidationError({'board': [
+                f'Допустимые значения: {", ".join(dict(TitleRanking.BOARDS))}.'
+            ]})
+        try:
+            limit = min(int(request.query_params.get(
+                'limit', settings.LEADERBOARD_SIZE
+            )), settings.LEADERBOARD_SIZE)
+        except ValueError:
+            raise ValidationError({'limit': ['Ожидается целое число.']})
+        rankings = TitleRanking.objects.filter(
+            board=board, position__lte=limit
+        ).select_related('title__category').prefetch_related(
+            'title__genre'
+        ).defer('title__search_vector')
+        return Response(TitleRankingSerializer(rankings, many=True).data)
+
+    @action(detail=True, methods=['GET'])
+    def stats(self, request, pk=None):
+        return self.cached_response(self.get_stats, request, pk=pk)
+
+    def get_stats(self, request, pk=None):
+        # Гистограмма хранится в строке произведения: отзывы не читаются.
+        title = get_object_or_404(Title.objects.only(
+            'rating_sum', 'rating_count',
+            *(histogram_field(score) for score in SCORES)
+        ), pk=pk)
+        return Response(TitleStatsSerializer(title).data)
+
+    @action(detail=False, methods=['POST'])
+    def bulk(self, request):
+        try:
+            ids = upsert_titles(request.data)
+        except BulkError as error:
+            return Response(error.errors, status=status.HTTP_400_BAD_REQUEST)
+        titles = self.get_queryset().in_bulk(ids)
+        serializer = TitleSerializer([titles[pk] for pk in ids], many=True)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
     def get_serializer_class(self):
         if self.request.method in ('POST', 'PATCH', 'DELETE'):
             return TitleCreateSerializer
         return TitleSerializer
 
 
-class ReviewsViewSet(viewsets.ModelViewSet):
+class ReviewsViewSet(BackgroundDeleteMixin, FastReadMixin, SparseFieldsMixin,
+                     viewsets.ModelViewSet):
     serializer_class = ReviewsSerializer
-    pagination_class = LimitOffsetPagination
+    fast_values = REVIEW_VALUES
+    fast_dicts = staticmethod(review_dicts)
+    sparse_fields = {
+        'id': ('id',),
+        'text': ('text',),
+        'author': ('author__username',),
+        'score': ('score',),
+        'pub_date': ('pub_date',),
+        'comment_count': ('comment_count',),
+    }
+    pagination_class = LimitOffsetOrCursorPagination
     permission_classes = (IsAuthenticatedOrReadOnly, IsAuthorOrModer,)
 
     def get_title(self):
-        return get_object_or_404(Title, pk=self.kwargs.get('title_id'))
+        if not hasattr(self, '_title'):
+            self._title = get_object_or_404(
+                Title, pk=self.kwargs.get('title_id')
+            )
+        return self._title
 
     def get_queryset(self):
-        return self.get_title().reviews.all()
+        if self.detail:
+            # Отзыв чужого произведения не найдётся, отдельно произведение
+            # проверять не нужно.
+            queryset = Review.objects.filter(
+                title_id=self.kwargs.get('title_id'),
+                title__pending_deletion=False,
+            ).select_related('author')
+            if self.action in ('update', 'partial_update'):
+                # Старая оценка для сдвига рейтинга читается под
+                # блокировкой строки, иначе два параллельных PATCH
+                # вычли бы из рейтинга одну и ту же оценку.
+                return queryset.select_for_update(of=('self',))
+            return queryset
+        return self.get_title().reviews.select_related('author')
 
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user, title=self.get_title())
+        title = self.get_title()
+        # Повторный отзыв отсекает ограничение unique_author_title, это
+        # надёжно и при одновременных запросах.
+        try:
+            with transaction.atomic():
+                serializer.save(author=self.request.user, title=title)
+        except IntegrityError:
+            raise ValidationError({api_settings.NON_FIELD_ERRORS_KEY: [
+                'Оставлять отзыв на одно произведение дважды запрещено!'
+            ]})
 
+    @transaction.atomic
+    def update(self, request, *args, **kwargs):
+        return super().update(request, *args, **kwargs)
 
-class CommentsViewSet(viewsets.ModelViewSet):
+
+class CommentsViewSet(FastReadMixin, SparseFieldsMixin,
+                      viewsets.ModelViewSet):
     serializer_class = CommentsSerializer
+    fast_values = COMMENT_VALUES
+    fast_dicts = staticmethod(comment_dicts)
+    sparse_fields = {
+        'id': ('id',),
+        'text': ('text',),
+        'author': ('author__username',),
+        'pub_date': ('pub_date',),
+    }
     permission_classes = (IsAuthenticatedOrReadOnly,
                           IsAuthorOrModer)
-    pagination_class = LimitOffsetPagination
+    pagination_class = LimitOffsetOrCursorPagination
+
+    def get_review(self):
+        if not hasattr(self, '_review'):
+            self._review = get_object_or_404(
+                Review,
+                pk=self.kwargs.get('review_id'),
+                title_id=self.kwargs.get('title_id'),
+                title__pending_deletion=False,
+            )
+        return self._review
 
     def get_queryset(self):
-        review_id = self.kwargs.get('review_id')
-        title_id = self.kwargs.get('title_id')
-        review = get_object_or_404(Review, pk=review_id, title__pk=title_id)
-        return review.comments.all()
+        if self.detail:
+            return Comment.objects.filter(
+                review_id=self.kwargs.get('review_id'),
+                review__title_id=self.kwargs.get('title_id'),
+                review__pending_deletion=False,
+                review__title__pending_deletion=False,
+            ).select_related('author')
+        return self.get_review().comments.select_related('author')
 
     def perform_create(self, serializer):
-        review_id = self.kwargs.get('review_id')
-        new_review = get_object_or_404(Review, pk=review_id)
-        serializer.save(author=self.request.user, review=new_review)
+        serializer.save(author=self.request.user, review=self.get_review())
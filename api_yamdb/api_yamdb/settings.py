@@ -2,6 +2,8 @@ import os
 from datetime import timedelta
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
+
 BASE_DIR = Path(__file__).resolve().parent.parent
 
 # SECURITY WARNING: keep the secret key used in production secret!
@@ -38,7 +40,19 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Замер времени и SQL-запросов по маршрутам, отчёт в /api/v1/metrics/.
+REQUEST_METRICS = os.getenv('REQUEST_METRICS', default='False') == 'True'
+if REQUEST_METRICS:
+    MIDDLEWARE.insert(0, 'api.middleware.RequestMetricsMiddleware')
+
 ROOT_URLCONF = 'api_yamdb.urls'
+# Под ASGI чтение произведений, отзывов и комментариев асинхронное.
+ASGI_URLCONF = 'api.async_urls'
+# Потоки пула асинхронного чтения (api.async_views) на процесс, у каждого
+# своё соединение с базой. Под ASGI процесс держит до ASYNC_READ_THREADS + 1
+# соединений: GUNICORN_WORKERS * (ASYNC_READ_THREADS + 1) вместе с другими
+# сервисами должно укладываться в max_connections PostgreSQL.
+ASYNC_READ_THREADS = int(os.getenv('ASYNC_READ_THREADS', default=4))
 
 TEMPLATES_DIR = BASE_DIR / 'templates'
 TEMPLATES = [
@@ -68,10 +82,95 @@ DATABASES = {
         'USER': os.getenv('POSTGRES_USER', default='postgres'),
         'PASSWORD': os.getenv('POSTGRES_PASSWORD', default='postgres'),
         'HOST': os.getenv('DB_HOST', default='db'),
-        'PORT': os.getenv('DB_PORT', default='5432')
+        'PORT': os.getenv('DB_PORT', default='5432'),
+        # Постоянные соединения: запрос не платит за новое подключение
+        # к PostgreSQL, соединение живёт CONN_MAX_AGE секунд.
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', default=60)),
+        # Проверка соединения перед запросом (api.signals), чтобы не
+        # получить ошибку на соединении, разорванном во время простоя.
+        'CONN_HEALTH_CHECKS': os.getenv('DB_CONN_HEALTH_CHECKS', default='True') == 'True',
+    }
+}
+
+# Необязательная реплика для чтения (api.routers.ReplicaRouter): запросы
+# GET/HEAD/OPTIONS читают с неё, запись и всё вне HTTP-запросов — с
+# default. Для SQLite достаточно DB_REPLICA_NAME с путём ко второму файлу.
+if os.getenv('DB_REPLICA_HOST') or os.getenv('DB_REPLICA_NAME'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': os.getenv('DB_REPLICA_NAME', default=DATABASES['default']['NAME']),
+        'HOST': os.getenv('DB_REPLICA_HOST', default=DATABASES['default']['HOST']),
+        'PORT': os.getenv('DB_REPLICA_PORT', default=DATABASES['default']['PORT']),
+        'TEST': {'MIRROR': 'default'},
+    }
+    MIDDLEWARE.append('api.middleware.ReplicaRoutingMiddleware')
+DATABASE_ROUTERS = ['api.routers.ReplicaRouter']
+# Сколько секунд после записи пользователь читает с основной базы, чтобы
+# увидеть свои изменения несмотря на отставание реплики.
+REPLICA_PIN_SECONDS = int(os.getenv('DB_REPLICA_PIN_SECONDS', default=10))
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND',
+            default='django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', default=''),
     }
 }
 
+# Прикрепление к основной базе после записи хранится в кэше и должно быть
+# видно всем процессам gunicorn: с кэшем в памяти процесса запись в одном
+# воркере не прикрепляет чтение в другом, и пользователь не видит своих
+# изменений на отстающей реплике.
+if 'replica' in DATABASES and CACHES['default']['BACKEND'] in (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+):
+    raise ImproperlyConfigured(
+        'Для реплики (DB_REPLICA_*) нужен общий для процессов кэш: '
+        'задайте CACHE_BACKEND и CACHE_LOCATION (Redis, memcached)'
+    )
+
+# Срок жизни закэшированных ответов каталога (категории, жанры,
+# произведения), секунды. С LocMemCache каждый процесс gunicorn видит
+# только свои сбросы кэша, поэтому в бою нужен общий бэкенд (Redis,
+# memcached), а этот срок ограничивает устаревание.
+CATALOG_CACHE_TIMEOUT = int(os.getenv('CATALOG_CACHE_TIMEOUT', default=60))
+
+# С какой оценки планировщика PostgreSQL пагинация отдаёт приблизительный
+# count вместо COUNT(*) (api.pagination.ApproximateCountPagination).
+APPROXIMATE_COUNT_THRESHOLD = int(
+    os.getenv('APPROXIMATE_COUNT_THRESHOLD', default=100000)
+)
+
+# Сколько секунд хранится размер таблицы и оценка запроса для этого count.
+APPROXIMATE_COUNT_CACHE_TIMEOUT = int(
+    os.getenv('APPROXIMATE_COUNT_CACHE_TIMEOUT', default=60)
+)
+
+# Удаление произведений, отзывов и пользователей в фоне: запрос только
+# скрывает объект, зависимые строки пакетами удаляет run_deletions.
+BACKGROUND_DELETION = os.getenv(
+    'BACKGROUND_DELETION', default='False'
+) == 'True'
+
+# Быстрое чтение произведений, отзывов и комментариев (api.fast_read):
+# .values() и orjson вместо ModelSerializer. Ответы те же байт в байт.
+FAST_READ_SERIALIZATION = os.getenv(
+    'FAST_READ_SERIALIZATION', default='False'
+) == 'True'
+
+# Рейтинги /api/v1/titles/top/ (reviews.leaderboards): число мест,
+# m байесовской оценки, окно и период полураспада популярности.
+LEADERBOARD_SIZE = 100
+LEADERBOARD_MIN_VOTES = 10
+TRENDING_DAYS = 7
+TRENDING_HALF_LIFE_HOURS = 24
+
+# Конфигурация полнотекстового поиска PostgreSQL для произведений.
+TITLE_SEARCH_CONFIG = 'russian'
+
 # Password validation
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -114,11 +213,11 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 AUTH_USER_MODEL = 'reviews.User'
 
 REST_FRAMEWORK = {
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.LimitOffsetPagination',
+    'DEFAULT_PAGINATION_CLASS': 'api.pagination.ApproximateCountPagination',
     'PAGE_SIZE': 10,
 
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.CachedUserJWTAuthentication',
     ],
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend',
@@ -128,6 +227,13 @@ SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=1),
     'AUTH_HEADER_TYPES': ('Bearer',)}
 
+# Срок кэширования роли и флагов пользователя, загруженных из базы или
+# записанных при сохранении. Изменения пользователя сразу записываются в
+# кэш, но с LocMemCache их видит только свой процесс, и в остальных
+# старая роль держится до USER_STATE_CACHE_TIMEOUT секунд, поэтому в бою,
+# как и для кэша каталога, нужен общий для всех процессов бэкенд.
+USER_STATE_CACHE_TIMEOUT = 60
+
 AUTH_USER_MODEL = 'reviews.User'
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
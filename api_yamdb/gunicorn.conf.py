@@ -0,0 +1,56 @@
+'''
+Настройки gunicorn для контейнера web. Все значения можно переопределить
+переменными окружения GUNICORN_*, по умолчанию они считаются от числа
+доступных процессу CPU.
+
+WSGI (по умолчанию):
+    gunicorn -c gunicorn.conf.py api_yamdb.wsgi:application
+ASGI через воркеры uvicorn:
+    GUNICORN_WORKER_CLASS=uvicorn.workers.UvicornWorker \
+        gunicorn -c gunicorn.conf.py api_yamdb.asgi:application
+'''
+import multiprocessing
+import os
+
+
+def available_cpus():
+    '''CPU, доступные процессу (учитывает cpuset контейнера).'''
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return multiprocessing.cpu_count()
+
+
+def env_int(name, default):
+    return int(os.getenv(name, default))
+
+
+cpus = available_cpus()
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:8000')
+# gthread: пока поток ждёт базу, другие потоки процесса обслуживают
+# запросы, а keep-alive с nginx работает (sync-воркеры его игнорируют).
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+workers = env_int('GUNICORN_WORKERS', cpus * 2 + 1)
+threads = env_int('GUNICORN_THREADS', 4)
+
+# Дольше keepalive_timeout в upstream nginx (60 с), чтобы соединение
+# первым закрывал nginx, а не gunicorn посреди запроса.
+keepalive = env_int('GUNICORN_KEEPALIVE', 75)
+timeout = env_int('GUNICORN_TIMEOUT', 30)
+graceful_timeout = env_int('GUNICORN_GRACEFUL_TIMEOUT', 30)
+
+# Перезапуск воркера после max_requests запросов ограничивает рост
+# памяти; jitter не даёт всем воркерам перезапуститься одновременно.
+max_requests = env_int('GUNICORN_MAX_REQUESTS', 1000)
+max_requests_jitter = env_int('GUNICORN_MAX_REQUESTS_JITTER', 100)
+
+# Django загружается один раз в мастере, воркеры делят память (copy on
+# write) и стартуют быстрее. Соединения с базой при импорте не
+# открываются, поэтому воркеры не делят унаследованный сокет.
+preload_app = os.getenv('GUNICORN_PRELOAD', 'True') == 'True'
+# Heartbeat воркеров в памяти, а не на диске overlayfs контейнера.
+worker_tmp_dir = os.getenv('GUNICORN_WORKER_TMP_DIR', '/dev/shm')
+
+accesslog = os.getenv('GUNICORN_ACCESS_LOG', '-')
+errorlog = '-'
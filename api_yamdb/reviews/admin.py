@@ -1,10 +1,38 @@
+from django.conf import settings
 from django.contrib import admin
 
+from .deletion import hide_for_deletion
+from .filters import search_titles
 from .models import Category, Comment, Genre, GenreTitle, Review, Title, User
 
 
+class BackgroundDeleteAdmin(admin.ModelAdmin):
+    '''
+    При BACKGROUND_DELETION удаление скрывает объекты для run_deletions,
+    а страница подтверждения не собирает все зависимые объекты.
+    '''
+
+    def get_deleted_objects(self, objs, request):
+        if not settings.BACKGROUND_DELETION:
+            return super().get_deleted_objects(objs, request)
+        return [str(obj) for obj in objs], {}, set(), []
+
+    def delete_model(self, request, obj):
+        if settings.BACKGROUND_DELETION:
+            hide_for_deletion(obj)
+        else:
+            super().delete_model(request, obj)
+
+    def delete_queryset(self, request, queryset):
+        if not settings.BACKGROUND_DELETION:
+            super().delete_queryset(request, queryset)
+            return
+        for obj in queryset:
+            hide_for_deletion(obj)
+
+
 @admin.register(User)
-class UserAdmin(admin.ModelAdmin):
+class UserAdmin(BackgroundDeleteAdmin):
     list_display = (
         'id',
         'username',
@@ -37,7 +65,7 @@ class GenreAdmin(admin.ModelAdmin):
 
 
 @admin.register(Title)
-class TitlesAdmin(admin.ModelAdmin):
+class TitlesAdmin(BackgroundDeleteAdmin):
     list_display = (
         'id',
         'name',
@@ -47,8 +75,14 @@ class TitlesAdmin(admin.ModelAdmin):
     )
     search_fields = ('description',)
     list_filter = ('year',)
+    readonly_fields = ('rating_sum', 'rating_count')
     empty_value_display = '-пусто-'
 
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return queryset, False
+        return search_titles(queryset, search_term), False
+
 
 @admin.register(GenreTitle)
 class GenreTitlesAdmin(admin.ModelAdmin):
@@ -60,7 +94,7 @@ class GenreTitlesAdmin(admin.ModelAdmin):
 
 
 @admin.register(Review)
-class ReviewsAdmin(admin.ModelAdmin):
+class ReviewsAdmin(BackgroundDeleteAdmin):
     list_display = (
         'id',
         'text',
@@ -0,0 +1,49 @@
+'''
+Сверка денормализованных счётчиков с исходными строками.
+
+Рейтинг и гистограмма Title и comment_count Review ведутся сигналами
+одним UPDATE с F-выражением. Массовая загрузка в обход сигналов, правки
+прямо в базе или сбой между записью и обновлением счётчика дают
+расхождения. reconcile проходит таблицу пакетами по первичному ключу,
+каждый пакет в своей транзакции, и переписывает только разошедшиеся
+строки, не блокируя таблицу целиком.
+'''
+from django.db import transaction
+from django.db.models import F, Q
+
+from .models import Review, Title
+
+# Модель и выражения актуальных значений её счётчиков.
+COUNTERS = (
+    (Title, Title.rating_totals),
+    (Review, Review.comment_totals),
+)
+
+
+def reconcile(model, totals, batch_size):
+    '''
+    Исправляет расхождения счётчиков model, после каждого пакета отдаёт
+    (проверено строк, исправлено строк).
+    '''
+    last_pk = 0
+    while True:
+        with transaction.atomic():
+            ids = list(model._base_manager.filter(
+                pk__gt=last_pk
+            ).order_by('pk').values_list('pk', flat=True)[:batch_size])
+            if not ids:
+                return
+            expressions = totals()
+            drift = Q()
+            for field in expressions:
+                drift |= ~Q(**{field: F(f'actual_{field}')})
+            drifted = list(model._base_manager.filter(pk__in=ids).annotate(**{
+                f'actual_{field}': expression
+                for field, expression in expressions.items()
+            }).filter(drift).values_list('pk', flat=True))
+            if drifted:
+                model._base_manager.filter(pk__in=drifted).update(
+                    **expressions
+                )
+        last_pk = ids[-1]
+        yield len(ids), len(drifted)
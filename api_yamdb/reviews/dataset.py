@@ -0,0 +1,165 @@
+'''Пакетная загрузка и генерация синтетических данных.'''
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .models import Category, Comment, Genre, GenreTitle, Review, Title, User
+
+
+@contextmanager
+def keep_pub_date(*models):
+    '''Отключает auto_now_add, чтобы сохранить заданные даты.'''
+    fields = [model._meta.get_field('pub_date') for model in models]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def reset_sequences(models):
+    '''Сдвигает последовательности id после вставки явных ключей.'''
+    statements = connection.ops.sequence_reset_sql(no_style(), models)
+    with connection.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
+
+
+def bulk_insert(model, objects, batch_size):
+    '''Вставляет объекты из итератора пакетами, не держа их все в памяти.'''
+    objects = iter(objects)
+    total = 0
+    while True:
+        batch = list(islice(objects, batch_size))
+        if not batch:
+            return total
+        with transaction.atomic():
+            model.objects.bulk_create(batch, batch_size=batch_size)
+        total += len(batch)
+
+
+def next_id(model):
+    return (model._base_manager.aggregate(last=Max('id'))['last'] or 0) + 1
+
+
+class DatasetGenerator:
+    '''
+    Добавляет titles произведений с reviews_per_title отзывами на каждое
+    и comments_per_review комментариями к каждому отзыву.
+    '''
+    categories = 5
+    genres = 20
+
+    def __init__(self, titles, reviews_per_title, comments_per_review=0,
+                 seed=None):
+        self.titles = titles
+        self.reviews_per_title = reviews_per_title
+        self.comments_per_review = comments_per_review
+        # Один автор не может дважды оценить произведение, поэтому
+        # авторов не меньше, чем отзывов на одно произведение.
+        self.users = max(reviews_per_title, 1) + 10
+        self.random = random.Random(seed)
+        self.now = timezone.now()
+        self.password = make_password(None)
+        self.first = {}
+
+    def pub_date(self):
+        return self.now - timedelta(
+            seconds=self.random.randrange(365 * 24 * 3600)
+        )
+
+    def user_rows(self, first):
+        for i in range(first, first + self.users):
+            yield User(id=i, username=f'user{i}',
+                       email=f'user{i}@yamdb.fake', password=self.password)
+
+    def category_rows(self, first):
+        for i in range(first, first + self.categories):
+            yield Category(id=i, name=f'Категория {i}', slug=f'category-{i}')
+
+    def genre_rows(self, first):
+        for i in range(first, first + self.genres):
+            yield Genre(id=i, name=f'Жанр {i}', slug=f'genre-{i}')
+
+    def title_rows(self, first):
+        for i in range(first, first + self.titles):
+            yield Title(
+                id=i,
+                name=f'Произведение {i}',
+                year=self.random.randint(1900, self.now.year),
+                description=f'Описание произведения {i}',
+                category_id=(self.first[Category]
+                             + self.random.randrange(self.categories)),
+            )
+
+    def genre_title_rows(self, first):
+        for i in range(self.first[Title], self.first[Title] + self.titles):
+            genres = self.random.sample(range(self.genres),
+                                        self.random.randint(1, 3))
+            for genre in genres:
+                yield GenreTitle(id=first, title_id=i,
+                                 genre_id=self.first[Genre] + genre)
+                first += 1
+
+    def review_rows(self, first):
+        for i in range(self.titles):
+            for j in range(self.reviews_per_title):
+                yield Review(
+                    id=first,
+                    title_id=self.first[Title] + i,
+                    author_id=self.first[User] + (i + j) % self.users,
+                    text=f'Отзыв {first}',
+                    score=self.random.randint(1, 10),
+                    pub_date=self.pub_date(),
+                )
+                first += 1
+
+    def comment_rows(self, first):
+        reviews = self.titles * self.reviews_per_title
+        for review in range(self.first[Review], self.first[Review] + reviews):
+            for _ in range(self.comments_per_review):
+                yield Comment(
+                    id=first,
+                    review_id=review,
+                    author_id=(self.first[User]
+                               + self.random.randrange(self.users)),
+                    text=f'Комментарий {first}',
+                    pub_date=self.pub_date(),
+                )
+                first += 1
+
+    def generate(self, batch_size=5000):
+        '''Возвращает словарь {модель: количество добавленных строк}.'''
+        tables = (
+            (User, self.user_rows),
+            (Category, self.category_rows),
+            (Genre, self.genre_rows),
+            (Title, self.title_rows),
+            (GenreTitle, self.genre_title_rows),
+            (Review, self.review_rows),
+            (Comment, self.comment_rows),
+        )
+        inserted = {}
+        with keep_pub_date(Review, Comment):
+            for model, rows in tables:
+                self.first[model] = next_id(model)
+                inserted[model] = bulk_insert(
+                    model, rows(self.first[model]), batch_size
+                )
+        with transaction.atomic():
+            Title.recalculate_rating()
+            Review.recalculate_comment_count()
+            Title.update_search_vector(
+                Title.objects.filter(id__gte=self.first[Title])
+            )
+        reset_sequences([model for model, _ in tables])
+        return inserted
@@ -0,0 +1,79 @@
+'''
+Фоновое удаление произведений, отзывов и пользователей
+(BACKGROUND_DELETION).
+
+Перед каскадным удалением сборщик Django загружает в память все
+зависимые отзывы и комментарии, поэтому удаление популярного
+произведения или активного пользователя не укладывается в таймаут
+запроса и долго держит блокировки. В этом режиме запрос только
+помечает объект pending_deletion, и менеджер по умолчанию его больше не
+возвращает. Команда run_deletions удаляет зависимые строки пакетами по
+batch_size, каждый пакет в своей транзакции, а сам объект — последним.
+Повторный запуск после сбоя продолжает с того же места.
+'''
+from django.db import transaction
+
+from .models import Comment, Review, Title, TitleRanking, User
+
+# Зависимые строки в порядке удаления: модель и путь к удаляемому объекту.
+# Комментарии идут первыми, чтобы отзывы удалялись без каскада.
+CASCADE_STEPS = {
+    Title: ((Comment, 'review__title'), (Review, 'title')),
+    Review: ((Comment, 'review'),),
+    User: ((Comment, 'author'), (Comment, 'review__author'),
+           (Review, 'author')),
+}
+
+
+def hide_for_deletion(instance):
+    '''Скрывает объект до удаления командой run_deletions.'''
+    instance.pending_deletion = True
+    update_fields = ['pending_deletion']
+    if isinstance(instance, User):
+        # Сохранение обновит кэш состояния, и выданные токены перестанут
+        # действовать.
+        instance.is_active = False
+        update_fields.append('is_active')
+    elif isinstance(instance, Review):
+        # Оценка уходит из рейтинга сразу; при удалении скрытого отзыва
+        # update_rating_on_delete её повторно не вычитает.
+        Title.change_rating(instance.title_id, removed=instance.score)
+    elif isinstance(instance, Title):
+        TitleRanking.objects.filter(title=instance).delete()
+    instance.save(update_fields=update_fields)
+
+
+def next_pending():
+    '''Первый скрытый объект, ожидающий удаления, или None.'''
+    for model in CASCADE_STEPS:
+        instance = model._base_manager.filter(
+            pending_deletion=True
+        ).order_by('pk').first()
+        if instance is not None:
+            return instance
+    return None
+
+
+def delete_in_batches(queryset, batch_size):
+    '''Удаляет строки queryset пакетами, отдаёт размер каждого пакета.'''
+    model = queryset.model
+    while True:
+        with transaction.atomic():
+            ids = list(queryset.values_list('pk', flat=True)[:batch_size])
+            if not ids:
+                return
+            model._base_manager.filter(pk__in=ids).delete()
+        yield len(ids)
+
+
+def delete_pending(instance, batch_size):
+    '''
+    Удаляет скрытый объект с зависимыми строками, после каждого пакета
+    отдаёт (модель, число удалённых строк).
+    '''
+    for model, path in CASCADE_STEPS[type(instance)]:
+        queryset = model._base_manager.filter(**{path: instance.pk})
+        for deleted in delete_in_batches(queryset, batch_size):
+            yield model, deleted
+    type(instance)._base_manager.filter(pk=instance.pk).delete()
+    yield type(instance), 1
@@ -1,14 +1,45 @@
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connections
+from django.db.models import Case, F, IntegerField, Q, Value, When
 from django_filters import CharFilter, FilterSet, NumberFilter
 from reviews.models import Title
 
 
+def search_titles(queryset, value):
+    '''
+    Полнотекстовый поиск по названию и описанию, лучшие совпадения первыми.
+    В PostgreSQL использует search_vector и GIN-индекс, в остальных базах
+    сводится к icontains с приоритетом совпадений в названии.
+    '''
+    if connections[queryset.db].vendor == 'postgresql':
+        query = SearchQuery(value, config=settings.TITLE_SEARCH_CONFIG,
+                            search_type='websearch')
+        return queryset.filter(search_vector=query).annotate(
+            rank=SearchRank(F('search_vector'), query)
+        ).order_by('-rank', 'id')
+    return queryset.filter(
+        Q(name__icontains=value) | Q(description__icontains=value)
+    ).annotate(
+        rank=Case(
+            When(name__icontains=value, then=Value(2)),
+            default=Value(1),
+            output_field=IntegerField(),
+        )
+    ).order_by('-rank', 'id')
+
+
 class TitleFilterSet(FilterSet):
     '''Фильтр для произведений'''
     category = CharFilter(field_name='category__slug')
     genre = CharFilter(field_name='genre__slug')
     name = CharFilter(field_name='name', lookup_expr='contains')
     year = NumberFilter(field_name='year')
+    search = CharFilter(method='filter_search')
 
     class Meta:
         model = Title
-        fields = ('category', 'genre', 'year', 'name')
+        fields = ('category', 'genre', 'year', 'name', 'search')
+
+    def filter_search(self, queryset, name, value):
+        return search_titles(queryset, value)
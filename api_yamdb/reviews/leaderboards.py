@@ -0,0 +1,79 @@
+'''
+Материализованные рейтинги произведений (TitleRanking).
+
+Лучшие (top): байесовская оценка (v * R + m * C) / (v + m), где R и v —
+средняя и число оценок произведения, C — средняя по всем отзывам, m —
+LEADERBOARD_MIN_VOTES. Произведение с парой отзывов не обгоняет
+проверенное сотнями. Считается по сохранённым rating_sum/rating_count,
+без агрегации отзывов.
+
+Популярные (trending): сумма score / 10 по отзывам за TRENDING_DAYS
+дней, вклад отзыва убывает вдвое каждые TRENDING_HALF_LIFE_HOURS часов.
+
+Рейтинги пересчитываются целиком командой refresh_leaderboards в одной
+транзакции, читатели до её завершения видят предыдущую версию.
+'''
+import heapq
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, FloatField, Sum
+from django.db.models.functions import Cast
+from django.utils import timezone
+
+from .models import Review, Title, TitleRanking
+
+
+def top_rated(size, min_votes):
+    '''[(title_id, байесовская оценка)] лучших произведений.'''
+    totals = Title.objects.aggregate(total=Sum('rating_sum'),
+                                     count=Sum('rating_count'))
+    if not totals['count']:
+        return []
+    prior = min_votes * totals['total'] / totals['count']
+    return list(
+        Title.objects.filter(rating_count__gt=0)
+        .annotate(weighted=(
+            (Cast('rating_sum', FloatField()) + prior)
+            / (F('rating_count') + min_votes)
+        ))
+        .order_by('-weighted', 'id')
+        .values_list('id', 'weighted')[:size]
+    )
+
+
+def trending(size, days, half_life_hours, now=None):
+    '''[(title_id, балл популярности)] по свежим отзывам.'''
+    now = now or timezone.now()
+    scores = defaultdict(float)
+    reviews = Review.objects.filter(
+        pub_date__gte=now - timedelta(days=days)
+    ).values_list('title_id', 'score', 'pub_date')
+    for title_id, score, pub_date in reviews.iterator():
+        age = (now - pub_date).total_seconds() / 3600
+        scores[title_id] += score / 10 * 0.5 ** (age / half_life_hours)
+    return heapq.nlargest(size, scores.items(),
+                          key=lambda item: (item[1], -item[0]))
+
+
+@transaction.atomic
+def refresh_leaderboards(now=None):
+    '''Пересчитывает все рейтинги, возвращает {рейтинг: число мест}.'''
+    size = settings.LEADERBOARD_SIZE
+    boards = {
+        TitleRanking.TOP: top_rated(size, settings.LEADERBOARD_MIN_VOTES),
+        TitleRanking.TRENDING: trending(
+            size, settings.TRENDING_DAYS,
+            settings.TRENDING_HALF_LIFE_HOURS, now
+        ),
+    }
+    for board, ranking in boards.items():
+        TitleRanking.objects.filter(board=board).delete()
+        TitleRanking.objects.bulk_create(
+            TitleRanking(board=board, position=position, title_id=title_id,
+                         score=round(score, 4))
+            for position, (title_id, score) in enumerate(ranking, 1)
+        )
+    return {board: len(ranking) for board, ranking in boards.items()}
@@ -0,0 +1,115 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from reviews.dataset import DatasetGenerator
+from reviews.models import Comment, GenreTitle, Review, Title
+
+# Индексы из миграции 0007, которые сравниваются с их отсутствием.
+BENCHMARK_INDEXES = (
+    (Title, 'title_year_idx'),
+    (Title, 'title_category_year_idx'),
+    (GenreTitle, 'genre_title_genre_idx'),
+)
+BENCHMARK_CONSTRAINTS = (
+    (GenreTitle, 'unique_title_genre'),
+)
+
+
+class Command(BaseCommand):
+    help = ('Показывает планы EXPLAIN и время горячих запросов с индексами '
+            'и без них на сгенерированных данных (изменения откатываются)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--titles', type=int, default=2000)
+        parser.add_argument('--reviews-per-title', type=int, default=20)
+        parser.add_argument('--comments-per-review', type=int, default=2)
+        parser.add_argument('--repeat', type=int, default=20,
+                            help='Сколько раз выполнять каждый запрос')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            DatasetGenerator(
+                options['titles'],
+                options['reviews_per_title'],
+                options['comments_per_review'],
+                seed=0,
+            ).generate()
+            self.analyze()
+            queries = self.hot_queries()
+            after = self.measure(queries, options['repeat'])
+            self.drop_indexes()
+            self.analyze()
+            before = self.measure(queries, options['repeat'])
+            transaction.set_rollback(True)
+        for name in queries:
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            for label, results in (('до', before), ('после', after)):
+                plan, timing = results[name]
+                self.stdout.write(f'  {label}: {timing:.3f} мс')
+                for line in plan.splitlines():
+                    self.stdout.write(f'    {line}')
+
+    def hot_queries(self):
+        title = Title.objects.order_by('-id').first()
+        review = title.reviews.order_by('id').first()
+        genre_title = GenreTitle.objects.filter(title=title).first()
+        titles = list(Title.objects.values_list('id', flat=True)[:10])
+        return {
+            'Повторный отзыв (unique_author_title, '
+            'ReviewsViewSet.perform_create)':
+                Review.objects.filter(author_id=review.author_id,
+                                      title_id=title.id),
+            'Отзывы произведения по дате':
+                Review.objects.filter(title_id=title.id)
+                .order_by('-pub_date', '-id')[:10],
+            'Комментарии к отзыву':
+                Comment.objects.filter(review_id=review.id,
+                                       review__title_id=title.id),
+            'Произведения по категории':
+                Title.objects.filter(category__slug=title.category.slug),
+            'Произведения по жанру':
+                Title.objects.filter(genre__slug=genre_title.genre.slug),
+            'Произведения по году':
+                Title.objects.filter(year=title.year),
+            'Произведения по категории и году':
+                Title.objects.filter(category__slug=title.category.slug,
+                                     year=title.year),
+            'Жанры страницы произведений':
+                GenreTitle.objects.filter(title_id__in=titles),
+        }
+
+    def measure(self, queries, repeat):
+        results = {}
+        for name, queryset in queries.items():
+            # Прогрев без замера: иначе замер «до», идущий вторым,
+            # получал бы страницы, прочитанные замером «после».
+            list(queryset.all())
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                list(queryset.all())
+                timings.append((time.perf_counter() - started) * 1000)
+            results[name] = (queryset.explain(),
+                             statistics.median(timings))
+        return results
+
+    def drop_indexes(self):
+        quote = connection.ops.quote_name
+        with connection.cursor() as cursor:
+            for model, name in BENCHMARK_INDEXES:
+                cursor.execute(f'DROP INDEX {quote(name)}')
+            if connection.vendor != 'postgresql':
+                # В SQLite ограничение уникальности входит в описание
+                # таблицы и без её пересоздания не удаляется.
+                return
+            for model, name in BENCHMARK_CONSTRAINTS:
+                cursor.execute(
+                    f'ALTER TABLE {quote(model._meta.db_table)} '
+                    f'DROP CONSTRAINT {quote(name)}'
+                )
+
+    def analyze(self):
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand
+from reviews.dataset import DatasetGenerator
+
+
+class Command(BaseCommand):
+    help = 'Добавляет в базу синтетические произведения, отзывы и комментарии'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--titles', type=int, required=True)
+        parser.add_argument('--reviews-per-title', type=int, required=True)
+        parser.add_argument('--comments-per-review', type=int, default=0)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=None,
+                            help='Зерно генератора для воспроизводимости')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        inserted = DatasetGenerator(
+            options['titles'],
+            options['reviews_per_title'],
+            options['comments_per_review'],
+            seed=options['seed'],
+        ).generate(batch_size=options['batch_size'])
+        elapsed = time.monotonic() - started
+        for model, rows in inserted.items():
+            self.stdout.write(f'{model._meta.verbose_name_plural}: {rows}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово за {elapsed:.1f} с, {sum(inserted.values())} строк'
+        ))
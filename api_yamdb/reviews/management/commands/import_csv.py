@@ -0,0 +1,185 @@
+import csv
+import os
+import time
+
+from api.cache import bump_generation
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils.dateparse import parse_datetime
+from reviews.dataset import keep_pub_date, reset_sequences
+from reviews.models import (Category, Comment, Genre, GenreTitle, Review,
+                            Title, User)
+
+DEFAULT_PATH = os.path.join(settings.BASE_DIR, 'static', 'data')
+
+
+class Command(BaseCommand):
+    help = 'Загружает данные из CSV-файлов static/data пакетами bulk_create'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path',
+            default=DEFAULT_PATH,
+            help='Каталог с CSV-файлами',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Количество строк в одном INSERT',
+        )
+
+    def handle(self, *args, **options):
+        self.path = options['path']
+        self.batch_size = options['batch_size']
+        if self.batch_size < 1:
+            raise CommandError('--batch-size должен быть больше нуля')
+        self.ids = {}
+        # Порядок важен: таблицы загружаются после тех, на кого ссылаются.
+        tables = (
+            ('users.csv', User, self.build_user),
+            ('category.csv', Category, self.build_category),
+            ('genre.csv', Genre, self.build_genre),
+            ('titles.csv', Title, self.build_title),
+            ('genre_title.csv', GenreTitle, self.build_genre_title),
+            ('review.csv', Review, self.build_review),
+            ('comments.csv', Comment, self.build_comment),
+        )
+        with keep_pub_date(Review, Comment):
+            for filename, model, build in tables:
+                self.load(filename, model, build)
+        with transaction.atomic():
+            Title.recalculate_rating()
+            Review.recalculate_comment_count()
+            Title.update_search_vector(Title._base_manager.all())
+        reset_sequences([model for _, model, _ in tables])
+        # bulk_create не вызывает сигналов, кэш каталога сбрасывается здесь.
+        bump_generation('categories', 'genres', 'titles', 'leaderboards')
+
+    def load(self, filename, model, build):
+        path = os.path.join(self.path, filename)
+        if not os.path.exists(path):
+            self.stdout.write(self.style.WARNING(f'{filename}: нет файла'))
+            return
+        started = time.monotonic()
+        # Дубликаты bulk_create(ignore_conflicts=True) молча пропускает,
+        # поэтому загруженные строки считаются по таблице до и после.
+        before = model._base_manager.count()
+        read = skipped = 0
+        batch = []
+        with open(path, encoding='utf-8', newline='') as csv_file:
+            for row in csv.DictReader(csv_file):
+                obj = build(row)
+                if obj is None:
+                    skipped += 1
+                    continue
+                batch.append(obj)
+                if len(batch) >= self.batch_size:
+                    read += self.save_batch(model, batch)
+                    batch = []
+                    self.report(filename, read, started)
+            if batch:
+                read += self.save_batch(model, batch)
+        loaded = model._base_manager.count() - before
+        self.report(filename, loaded, started, skipped + read - loaded,
+                    done=True)
+
+    def save_batch(self, model, batch):
+        with transaction.atomic():
+            model.objects.bulk_create(
+                batch, batch_size=self.batch_size, ignore_conflicts=True
+            )
+        return len(batch)
+
+    def report(self, filename, rows, started, skipped=0, done=False):
+        '''
+        В ходе загрузки rows — обработанные строки файла, в итоге —
+        добавленные в таблицу.
+        '''
+        elapsed = time.monotonic() - started
+        speed = rows / elapsed if elapsed else rows
+        if not done:
+            self.stdout.write(f'{filename}: обработано {rows} строк, '
+                              f'{speed:.0f} строк/с')
+            return
+        message = f'{filename}: загружено {rows} строк, {speed:.0f} строк/с'
+        if skipped:
+            message += f', пропущено {skipped}'
+        self.stdout.write(self.style.SUCCESS(message))
+
+    def existing_ids(self, model):
+        '''Возвращает множество id таблицы, на которую ссылается файл.'''
+        if model not in self.ids:
+            self.ids[model] = set(
+                model._base_manager.values_list('pk', flat=True).iterator()
+            )
+        return self.ids[model]
+
+    def resolve(self, model, value):
+        if not value:
+            return None
+        pk = int(value)
+        return pk if pk in self.existing_ids(model) else None
+
+    def build_user(self, row):
+        return User(
+            id=row['id'],
+            username=row['username'],
+            email=row['email'],
+            role=row['role'] or User.USER,
+            bio=row['bio'],
+            first_name=row['first_name'],
+            last_name=row['last_name'],
+            password=make_password(None),
+        )
+
+    def build_category(self, row):
+        return Category(id=row['id'], name=row['name'], slug=row['slug'])
+
+    def build_genre(self, row):
+        return Genre(id=row['id'], name=row['name'], slug=row['slug'])
+
+    def build_title(self, row):
+        return Title(
+            id=row['id'],
+            name=row['name'],
+            year=row['year'],
+            description=row.get('description', ''),
+            category_id=self.resolve(Category, row['category']),
+        )
+
+    def build_genre_title(self, row):
+        title_id = self.resolve(Title, row['title_id'])
+        genre_id = self.resolve(Genre, row['genre_id'])
+        if title_id is None or genre_id is None:
+            return None
+        return GenreTitle(id=row['id'], title_id=title_id, genre_id=genre_id)
+
+    def build_review(self, row):
+        title_id = self.resolve(Title, row['title_id'])
+        author_id = self.resolve(User, row['author'])
+        if title_id is None or author_id is None:
+            return None
+        return Review(
+            id=row['id'],
+            title_id=title_id,
+            author_id=author_id,
+            text=row['text'],
+            score=row['score'],
+            pub_date=parse_datetime(row['pub_date']),
+        )
+
+    def build_comment(self, row):
+        review_id = self.resolve(Review, row['review_id'])
+        author_id = self.resolve(User, row['author'])
+        if review_id is None or author_id is None:
+            return None
+        return Comment(
+            id=row['id'],
+            review_id=review_id,
+            author_id=author_id,
+            text=row['text'],
+            pub_date=parse_datetime(row['pub_date']),
+        )
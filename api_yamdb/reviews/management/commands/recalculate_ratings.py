@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from reviews.models import Title
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает сохранённый рейтинг и гистограмму оценок '
+            'произведений по отзывам')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            Title.recalculate_rating()
+        self.stdout.write(self.style.SUCCESS(
+            f'Рейтинг и гистограмма пересчитаны для '
+            f'{Title.objects.count()} произведений'
+        ))
@@ -1,8 +1,36 @@
-from django.contrib.auth.models import AbstractUser
+from collections import Counter
+
+from django.conf import settings
+from django.contrib.auth.models import AbstractUser, UserManager
+from django.contrib.postgres.search import SearchVector, SearchVectorField
 from django.core.validators import RegexValidator
-from django.db import models
+from django.db import connections, models
+from django.db.models import Count, F, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
 from reviews.validators import score_validator, year_validator
 
+# Корзины гистограммы оценок произведения.
+SCORES = range(1, 11)
+
+
+def histogram_field(score):
+    '''Счётчик оценки в Title; 0, допустимый валидатором, идёт в корзину 1.'''
+    return f'score_{max(score, SCORES[0])}_count'
+
+
+class VisibleManager(models.Manager):
+    '''
+    Менеджер по умолчанию без объектов, скрытых до фонового удаления
+    (reviews.deletion). Базовый менеджер (_base_manager) видит все строки.
+    '''
+
+    def get_queryset(self):
+        return super().get_queryset().filter(pending_deletion=False)
+
+
+class VisibleUserManager(VisibleManager, UserManager):
+    pass
+
 
 class User(AbstractUser):
     '''Модель пользователи'''
@@ -58,9 +86,12 @@ class User(AbstractUser):
         null=True,
         blank=True
     )
+    pending_deletion = models.BooleanField(default=False, editable=False)
     REQUIRED_FIELDS = ['email', ]
     USERNAME_FIELD = 'username'
 
+    objects = VisibleUserManager()
+
     class Meta:
         ordering = ('id',)
         verbose_name = 'Пользователь'
@@ -134,10 +165,132 @@ class Title(models.Model):
                                  related_name='titles',
                                  blank=True,
                                  null=True)
+    rating_sum = models.PositiveIntegerField('Сумма оценок', default=0)
+    rating_count = models.PositiveIntegerField('Количество оценок',
+                                               default=0)
+    # Гистограмма оценок: число отзывов с каждой оценкой (histogram_field).
+    score_1_count = models.PositiveIntegerField(
+        'Оценок 1', default=0, editable=False
+    )
+    score_2_count = models.PositiveIntegerField(
+        'Оценок 2', default=0, editable=False
+    )
+    score_3_count = models.PositiveIntegerField(
+        'Оценок 3', default=0, editable=False
+    )
+    score_4_count = models.PositiveIntegerField(
+        'Оценок 4', default=0, editable=False
+    )
+    score_5_count = models.PositiveIntegerField(
+        'Оценок 5', default=0, editable=False
+    )
+    score_6_count = models.PositiveIntegerField(
+        'Оценок 6', default=0, editable=False
+    )
+    score_7_count = models.PositiveIntegerField(
+        'Оценок 7', default=0, editable=False
+    )
+    score_8_count = models.PositiveIntegerField(
+        'Оценок 8', default=0, editable=False
+    )
+    score_9_count = models.PositiveIntegerField(
+        'Оценок 9', default=0, editable=False
+    )
+    score_10_count = models.PositiveIntegerField(
+        'Оценок 10', default=0, editable=False
+    )
+    search_vector = SearchVectorField(null=True, editable=False)
+    pending_deletion = models.BooleanField(default=False, editable=False)
+
+    objects = VisibleManager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=('year',), name='title_year_idx'),
+            models.Index(fields=('category', 'year'),
+                         name='title_category_year_idx'),
+        ]
 
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or {'name', 'description'} & set(
+                update_fields):
+            Title.update_search_vector(Title.objects.filter(pk=self.pk))
+
+    @classmethod
+    def update_search_vector(cls, queryset):
+        '''Обновляет поисковый вектор (только для PostgreSQL).'''
+        if connections[queryset.db].vendor != 'postgresql':
+            return
+        config = settings.TITLE_SEARCH_CONFIG
+        queryset.update(
+            search_vector=(
+                SearchVector('name', weight='A', config=config)
+                + SearchVector('description', weight='B', config=config)
+            )
+        )
+
+    @property
+    def rating(self):
+        if not self.rating_count:
+            return None
+        return self.rating_sum / self.rating_count
+
+    @property
+    def score_histogram(self):
+        return [getattr(self, histogram_field(score)) for score in SCORES]
+
+    @classmethod
+    def change_rating(cls, title_id, added=None, removed=None):
+        '''
+        Инкрементально учитывает в рейтинге и гистограмме добавленную
+        и/или убранную оценку одним UPDATE без чтения отзывов.
+        '''
+        changes = Counter()
+        for score, sign in ((added, 1), (removed, -1)):
+            if score is not None:
+                changes['rating_sum'] += sign * score
+                changes['rating_count'] += sign
+                changes[histogram_field(score)] += sign
+        changes = {field: F(field) + delta
+                   for field, delta in changes.items() if delta}
+        if changes:
+            cls.objects.filter(pk=title_id).update(**changes)
+
+    @classmethod
+    def recalculate_rating(cls):
+        '''Пересчитывает рейтинг и гистограмму оценок всех произведений
+        по отзывам.'''
+        cls.objects.update(**cls.rating_totals())
+
+    @staticmethod
+    def rating_totals():
+        '''Выражения для UPDATE: рейтинг и гистограмма по отзывам.'''
+        reviews = Review.objects.filter(
+            title=OuterRef('pk')
+        ).order_by().values('title')
+
+        def total(aggregate):
+            return Coalesce(
+                Subquery(reviews.annotate(total=aggregate).values('total')), 0
+            )
+
+        histogram = {
+            histogram_field(score): total(Count('pk', filter=(
+                Q(score__lte=score) if score == SCORES[0] else Q(score=score)
+            )))
+            for score in SCORES
+        }
+        return {
+            'rating_sum': total(Sum('score')),
+            'rating_count': total(Count('pk')),
+            **histogram,
+        }
+
 
 class GenreTitle(models.Model):
     genre = models.ForeignKey(Genre,
@@ -149,6 +302,18 @@ class GenreTitle(models.Model):
                               blank=True,
                               null=True)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=('title', 'genre'),
+                name='unique_title_genre'
+            )
+        ]
+        indexes = [
+            models.Index(fields=('genre', 'title'),
+                         name='genre_title_genre_idx'),
+        ]
+
     def __str__(self):
         return f'{self.genre} {self.title}'
 
@@ -167,6 +332,12 @@ class Review(models.Model):
                                 validators=(score_validator,)
                                 )
     pub_date = models.DateTimeField('Дата публикации', auto_now_add=True)
+    comment_count = models.PositiveIntegerField(
+        'Количество комментариев', default=0, editable=False
+    )
+    pending_deletion = models.BooleanField(default=False, editable=False)
+
+    objects = VisibleManager()
 
     class Meta:
         constraints = [
@@ -175,10 +346,44 @@ class Review(models.Model):
                 name='unique_author_title'
             )
         ]
+        indexes = [
+            models.Index(fields=('title', 'pub_date', 'id'),
+                         name='review_title_pub_date_idx'),
+            # Отзывы за последние дни для рейтинга популярности.
+            models.Index(fields=('pub_date',), name='review_pub_date_idx'),
+        ]
 
     def __str__(self):
         return self.text[:50]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_score = instance.__dict__.get('score')
+        return instance
+
+    @classmethod
+    def change_comment_count(cls, review_id, delta):
+        '''Сдвигает comment_count одним UPDATE, без чтения отзыва.'''
+        cls._base_manager.filter(pk=review_id).update(
+            comment_count=F('comment_count') + delta
+        )
+
+    @classmethod
+    def recalculate_comment_count(cls):
+        '''Пересчитывает comment_count всех отзывов по комментариям.'''
+        cls._base_manager.update(**cls.comment_totals())
+
+    @staticmethod
+    def comment_totals():
+        '''Выражение для UPDATE: число комментариев отзыва.'''
+        comments = Comment.objects.filter(
+            review=OuterRef('pk')
+        ).order_by().values('review')
+        return {'comment_count': Coalesce(Subquery(
+            comments.annotate(total=Count('pk')).values('total')
+        ), 0)}
+
 
 class Comment(models.Model):
     review = models.ForeignKey(Review,
@@ -192,5 +397,40 @@ class Comment(models.Model):
                                     auto_now_add=True,
                                     db_index=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=('review', 'pub_date', 'id'),
+                         name='comment_review_pub_date_idx'),
+        ]
+
     def __str__(self):
         return self.text[:50]
+
+
+class TitleRanking(models.Model):
+    '''Позиция произведения в материализованном рейтинге'''
+    TOP = 'top'
+    TRENDING = 'trending'
+    BOARDS = (
+        (TOP, 'Лучшие по взвешенной оценке'),
+        (TRENDING, 'Популярные за последние дни'),
+    )
+    board = models.CharField('Рейтинг', max_length=16, choices=BOARDS)
+    position = models.PositiveIntegerField('Место')
+    title = models.ForeignKey(Title,
+                              on_delete=models.CASCADE,
+                              related_name='rankings')
+    score = models.FloatField('Балл')
+    updated = models.DateTimeField('Дата расчёта', auto_now_add=True)
+
+    class Meta:
+        ordering = ('board', 'position')
+        constraints = [
+            models.UniqueConstraint(
+                fields=('board', 'position'),
+                name='unique_board_position'
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.board} #{self.position}: {self.title_id}'
@@ -0,0 +1,36 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Comment, Review, Title
+
+
+@receiver(post_save, sender=Review)
+def update_rating_on_save(sender, instance, created, **kwargs):
+    '''Учитывает новую или изменённую оценку в рейтинге и гистограмме.'''
+    if created:
+        Title.change_rating(instance.title_id, added=instance.score)
+    else:
+        old_score = getattr(instance, '_loaded_score', None)
+        if old_score is not None and old_score != instance.score:
+            Title.change_rating(instance.title_id, added=instance.score,
+                                removed=old_score)
+    instance._loaded_score = instance.score
+
+
+@receiver(post_delete, sender=Review)
+def update_rating_on_delete(sender, instance, **kwargs):
+    '''Убирает оценку удалённого отзыва из рейтинга и гистограммы.'''
+    # Оценку скрытого отзыва убрал уже hide_for_deletion.
+    if not instance.pending_deletion:
+        Title.change_rating(instance.title_id, removed=instance.score)
+
+
+@receiver(post_save, sender=Comment)
+def count_comment_on_save(sender, instance, created, **kwargs):
+    if created:
+        Review.change_comment_count(instance.review_id, 1)
+
+
+@receiver(post_delete, sender=Comment)
+def count_comment_on_delete(sender, instance, **kwargs):
+    Review.change_comment_count(instance.review_id, -1)
@@ -0,0 +1,91 @@
+'''
+Сравнение пропускной способности WSGI и ASGI при большом числе
+одновременных клиентов. Сервисы bench-wsgi и bench-asgi из профиля bench
+запускают один и тот же образ с одинаковым числом процессов:
+
+    docker-compose --profile bench up -d
+    python bench_concurrency.py --concurrency 200 --requests 5000 \\
+        wsgi=http://localhost:8001 asgi=http://localhost:8002
+
+Каждый клиент держит своё соединение и повторяет анонимный GET; к адресу
+добавляется уникальный параметр, чтобы кэш каталога не подменял запросы
+к базе. Для каждого сервера выводятся запросы в секунду, задержки
+p50/p99 и число ошибок.
+'''
+import argparse
+import math
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from itertools import count
+
+import requests
+
+PATHS = ('/api/v1/titles/', '/api/v1/titles/1/reviews/')
+
+
+def percentile(values, percent):
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(percent / 100 * len(ordered)) - 1)]
+
+
+class Load:
+    def __init__(self, base_url, total, timeout):
+        self.base_url = base_url
+        self.total = total
+        self.timeout = timeout
+        self.numbers = count()
+        self.lock = threading.Lock()
+        self.timings = []
+        self.errors = Counter()
+
+    def client(self):
+        session = requests.Session()
+        while True:
+            number = next(self.numbers)
+            if number >= self.total:
+                return
+            url = (f'{self.base_url}{PATHS[number % len(PATHS)]}'
+                   f'?bench={number}')
+            started = time.perf_counter()
+            try:
+                status = session.get(url, timeout=self.timeout).status_code
+            except requests.RequestException as error:
+                status = type(error).__name__
+            elapsed = (time.perf_counter() - started) * 1000
+            with self.lock:
+                if status == 200:
+                    self.timings.append(elapsed)
+                else:
+                    self.errors[status] += 1
+
+    def run(self, concurrency):
+        started = time.perf_counter()
+        with ThreadPoolExecutor(concurrency) as executor:
+            for _ in range(concurrency):
+                executor.submit(self.client)
+        return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('servers', nargs='+', metavar='NAME=URL')
+    parser.add_argument('--concurrency', type=int, default=100)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--timeout', type=float, default=30)
+    args = parser.parse_args()
+
+    print(f'{"сервер":8} {"запр/с":>8} {"p50, мс":>9} {"p99, мс":>9}  ошибки')
+    for server in args.servers:
+        name, base_url = server.split('=', 1)
+        load = Load(base_url.rstrip('/'), args.requests, args.timeout)
+        duration = load.run(args.concurrency)
+        timings = load.timings or [math.nan]
+        print(f'{name:8} {len(load.timings) / duration:8.1f} '
+              f'{percentile(timings, 50):9.1f} '
+              f'{percentile(timings, 99):9.1f}  {dict(load.errors)}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+'''
+Проверка микрокэша nginx на локальном стенде docker-compose:
+
+    docker-compose up -d
+    python cache_hit_rate.py --requests 200
+
+Скрипт повторяет анонимные GET к каталогу, считает значения заголовка
+X-Cache-Status (HIT, MISS, EXPIRED, UPDATING, ...) и долю попаданий,
+затем проверяет, что запрос с Authorization идёт мимо кэша (BYPASS), а
+ответ длиннее gzip_min_length сжимается gzip.
+'''
+import argparse
+import sys
+from collections import Counter
+
+import requests
+
+PATHS = (
+    '/api/v1/titles/',
+    '/api/v1/genres/',
+    '/api/v1/categories/',
+    '/redoc/',
+)
+HIT_STATUSES = ('HIT', 'STALE', 'UPDATING', 'REVALIDATED')
+GZIP_MIN_LENGTH = 1024
+
+
+def cache_statuses(session, url, count):
+    statuses = Counter()
+    for _ in range(count):
+        response = session.get(url)
+        statuses[response.headers.get('X-Cache-Status', 'NONE')] += 1
+    return statuses
+
+
+def hit_rate(statuses):
+    total = sum(statuses.values())
+    return sum(statuses[status] for status in HIT_STATUSES) / total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--base-url', default='http://localhost')
+    parser.add_argument('--requests', type=int, default=100)
+    args = parser.parse_args()
+
+    session = requests.Session()
+    ok = True
+    for path in PATHS:
+        statuses = cache_statuses(session, args.base_url + path,
+                                  args.requests)
+        rate = hit_rate(statuses)
+        print(f'{path:24} попаданий {rate:6.1%}  {dict(statuses)}')
+        ok = ok and rate > 0
+
+    path = PATHS[0]
+    response = session.get(args.base_url + path,
+                           headers={'Authorization': 'Bearer test'})
+    bypass = response.headers.get('X-Cache-Status')
+    print(f'{path:24} с Authorization: {bypass}')
+    response = session.get(args.base_url + path,
+                           headers={'Accept-Encoding': 'gzip'})
+    encoding = response.headers.get('Content-Encoding')
+    print(f'{path:24} Content-Encoding: {encoding}')
+    compressed = (encoding == 'gzip'
+                  or len(response.content) < GZIP_MIN_LENGTH)
+    ok = ok and bypass == 'BYPASS' and compressed
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
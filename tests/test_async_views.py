@@ -0,0 +1,141 @@
+import asyncio
+import threading
+import time
+from io import BytesIO
+
+import pytest
+from api.async_views import database_sync_to_async
+from api.authentication import token_for_user
+from api.views import ReviewsViewSet
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.cache import cache
+from django.test import AsyncClient, override_settings
+from reviews.models import Comment, Review, Title
+
+
+@pytest.fixture
+def review(user):
+    title = Title.objects.create(name='Title', year=2000)
+    review = Review.objects.create(title=title, author=user, text='text',
+                                   score=7)
+    Comment.objects.create(review=review, author=user, text='comment')
+    return review
+
+
+def async_get(path, **extra):
+    with override_settings(ROOT_URLCONF=settings.ASGI_URLCONF):
+        return async_to_sync(AsyncClient().get)(path, **extra)
+
+
+async def asgi_request(path, user=None):
+    '''GET через api_yamdb.asgi.application: статус и тело ответа.'''
+    from api_yamdb.asgi import application
+
+    headers = [(b'host', b'testserver')]
+    if user is not None:
+        headers.append((b'authorization',
+                        f'Bearer {token_for_user(user)}'.encode()))
+    scope = {'type': 'http', 'method': 'GET', 'path': path,
+             'query_string': b'', 'headers': headers}
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b''}
+
+    async def send(message):
+        messages.append(message)
+
+    await application(scope, receive, send)
+    body = b''.join(message.get('body', b'') for message in messages[1:])
+    return messages[0]['status'], body
+
+
+def asgi_get(path, user=None):
+    return async_to_sync(asgi_request)(path, user)
+
+
+# Запросы к базе идут из потоков пула, им нужны закоммиченные данные.
+@pytest.mark.django_db(transaction=True)
+class TestAsyncReadViews:
+
+    def test_responses_match_wsgi(self, client, review):
+        reviews = f'/api/v1/titles/{review.title_id}/reviews/'
+        comments = f'{reviews}{review.id}/comments/'
+        for path in ('/api/v1/titles/', f'/api/v1/titles/{review.title_id}/',
+                     reviews, f'{reviews}{review.id}/', comments,
+                     f'{reviews}?cursor=', '/api/v1/titles/?year=2000'):
+            expected = client.get(path)
+            cache.clear()
+            response = async_get(path)
+            assert response.status_code == expected.status_code == 200
+            assert response.content == expected.content, path
+
+    def test_not_found(self, client, review):
+        path = f'/api/v1/titles/{review.title_id}/reviews/0/'
+        response = async_get(path)
+        assert response.status_code == 404
+        assert response.content == client.get(path).content
+
+    def test_writes_fall_back_to_drf(self, review):
+        path = f'/api/v1/titles/{review.title_id}/reviews/'
+        with override_settings(ROOT_URLCONF=settings.ASGI_URLCONF):
+            response = async_to_sync(AsyncClient().post)(
+                path, {'text': 'text', 'score': 5},
+                content_type='application/json',
+            )
+        assert response.status_code == 401
+
+    def test_handler_uses_asgi_urlconf(self):
+        from api_yamdb.asgi import application
+
+        request, error = application.create_request({
+            'type': 'http', 'method': 'GET', 'path': '/api/v1/titles/',
+            'query_string': b'', 'headers': [],
+        }, BytesIO())
+        assert error is None
+        assert request.urlconf == settings.ASGI_URLCONF
+
+    def test_export_streams_under_asgi(self, admin, review):
+        status, body = asgi_get('/api/v1/export/titles/', admin)
+        assert status == 200
+        assert body.decode().splitlines() == [
+            'id,name,year,category,description',
+            f'{review.title_id},Title,2000,,',
+        ]
+
+    def test_authenticated_reads_run_concurrently(self, user, review,
+                                                  monkeypatch):
+        list_reviews = ReviewsViewSet.list
+
+        def slow_list(self, request, *args, **kwargs):
+            time.sleep(0.3)
+            return list_reviews(self, request, *args, **kwargs)
+
+        monkeypatch.setattr(ReviewsViewSet, 'list', slow_list)
+        path = f'/api/v1/titles/{review.title_id}/reviews/'
+
+        async def read_twice():
+            return await asyncio.gather(asgi_request(path, user),
+                                        asgi_request(path, user))
+
+        started = time.monotonic()
+        responses = async_to_sync(read_twice)()
+        assert [status for status, _ in responses] == [200, 200]
+        assert time.monotonic() - started < 0.55
+
+    def test_reads_use_bounded_pool(self):
+        threads = set()
+
+        def read():
+            threads.add(threading.current_thread().name)
+            time.sleep(0.02)
+
+        pooled = database_sync_to_async(read)
+
+        async def read_all():
+            await asyncio.gather(*(pooled() for _ in range(20)))
+
+        async_to_sync(read_all)()
+        assert all(name.startswith('async-read') for name in threads)
+        assert len(threads) <= settings.ASYNC_READ_THREADS
@@ -0,0 +1,78 @@
+import time
+
+import pytest
+from api.authentication import token_for_user
+from django.core.cache import cache
+from rest_framework.test import APIClient
+from reviews.models import Title, User
+
+
+def client_for(user):
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {token_for_user(user)}')
+    return client
+
+
+@pytest.mark.django_db
+class TestCachedUserAuthentication:
+
+    def test_cached_state_skips_user_query(
+            self, admin, django_assert_num_queries):
+        cache.clear()
+        client = client_for(admin)
+        # Первый запрос читает состояние из базы и кэширует его.
+        with django_assert_num_queries(3):
+            client.get('/api/v1/users/')
+        # count + страница пользователей, без запроса текущего пользователя.
+        with django_assert_num_queries(2):
+            response = client.get('/api/v1/users/')
+        assert response.status_code == 200
+
+    def test_claims_are_not_trusted_on_cache_miss(self, admin):
+        client = client_for(admin)
+        User.objects.filter(pk=admin.pk).update(role=User.USER)
+        # Промах кэша: вытеснение или другой процесс gunicorn.
+        cache.clear()
+        assert client.get('/api/v1/users/').status_code == 403
+        assert client.get('/api/v1/export/users/').status_code == 403
+
+    def test_hidden_user_is_rejected_on_cache_miss(self, user):
+        client = client_for(user)
+        User.objects.filter(pk=user.pk).update(pending_deletion=True)
+        cache.clear()
+        assert client.get('/api/v1/titles/').status_code == 401
+
+    def test_state_cached_on_save_expires(self, admin, settings):
+        settings.USER_STATE_CACHE_TIMEOUT = 0.05
+        client = client_for(admin)
+        admin.save()
+        # Роль сменил другой процесс со своим LocMemCache.
+        User.objects.filter(pk=admin.pk).update(role=User.USER)
+        time.sleep(0.1)
+        assert client.get('/api/v1/users/').status_code == 403
+
+    def test_write_does_not_load_user(self, user, django_assert_num_queries):
+        title = Title.objects.create(name='Title', year=2000)
+        cache.clear()
+        client = client_for(user)
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        client.post(url, {'text': 'text', 'score': 5})
+        review_id = title.reviews.get().id
+        with django_assert_num_queries(4):
+            # Без загрузки пользователя: отзыв вместе с автором, UPDATE
+            # отзыва и savepoint-ы транзакции.
+            response = client.patch(f'{url}{review_id}/', {'text': 'new'})
+        assert response.status_code == 200
+
+    def test_role_change_invalidates_claims(self, admin_client, user):
+        client = client_for(user)
+        assert client.get('/api/v1/users/').status_code == 403
+        response = admin_client.patch(f'/api/v1/users/{user.username}/',
+                                      {'role': 'admin'})
+        assert response.status_code == 200
+        assert client.get('/api/v1/users/').status_code == 200
+
+    def test_deleted_user_is_rejected(self, admin_client, user):
+        client = client_for(user)
+        admin_client.delete(f'/api/v1/users/{user.username}/')
+        assert client.get('/api/v1/titles/').status_code == 401
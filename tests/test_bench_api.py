@@ -0,0 +1,30 @@
+import pytest
+from api.benchmark import build_routes, percentile, run_benchmark
+from reviews.dataset import DatasetGenerator
+
+# Верхние границы числа SQL-запросов на маршрут: рост означает N+1.
+MAX_QUERIES = {
+    'titles-list': 3,
+    'titles-detail': 2,
+    'reviews-list': 4,
+    'comments-list': 4,
+}
+
+
+def test_percentile():
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 99) == 99
+    assert percentile([7], 95) == 7
+
+
+@pytest.mark.django_db
+def test_api_routes_benchmark():
+    DatasetGenerator(titles=15, reviews_per_title=12,
+                     comments_per_review=12, seed=0).generate()
+    results = run_benchmark(build_routes(), requests=2, warmup=0)
+    for result in results:
+        assert result.status in (200, 201), result.route.name
+        limit = MAX_QUERIES.get(result.route.name)
+        if limit is not None:
+            assert result.queries <= limit, result.route.name
@@ -0,0 +1,100 @@
+import pytest
+from reviews.models import Category, Genre, Title, TitleRanking
+
+
+@pytest.fixture
+def catalog():
+    Category.objects.create(name='Фильм', slug='movie')
+    Genre.objects.create(name='Драма', slug='drama')
+    Genre.objects.create(name='Комедия', slug='comedy')
+
+
+@pytest.mark.django_db
+class TestBulkCatalog:
+
+    def test_genres_upsert(self, admin_client, catalog):
+        response = admin_client.post('/api/v1/genres/bulk/', [
+            {'name': 'Драмы', 'slug': 'drama'},
+            {'name': 'Ужасы', 'slug': 'horror'},
+        ], format='json')
+        assert response.status_code == 201
+        assert Genre.objects.get(slug='drama').name == 'Драмы'
+        assert Genre.objects.filter(slug='horror').exists()
+
+    def test_errors_are_per_item_and_nothing_is_written(self, admin_client,
+                                                        catalog):
+        response = admin_client.post('/api/v1/categories/bulk/', [
+            {'name': 'Книга', 'slug': 'book'},
+            {'name': 'Фильм', 'slug': 'film'},
+            {'name': 'Музыка'},
+        ], format='json')
+        assert response.status_code == 400
+        errors = response.json()
+        assert errors[0] == {}
+        assert 'name' in errors[1]
+        assert 'slug' in errors[2]
+        assert not Category.objects.filter(slug='book').exists()
+
+    def test_titles_upsert(self, admin_client, catalog,
+                           django_assert_max_num_queries):
+        Title.objects.create(name='Старое', year=1990,
+                             category=Category.objects.get())
+        items = [
+            {'name': f'Произведение {i}', 'year': 2000, 'category': 'movie',
+             'genre': ['drama', 'comedy']}
+            for i in range(20)
+        ]
+        items.append({'name': 'Старое', 'year': 1990, 'category': 'movie',
+                      'genre': ['drama'], 'description': 'Новое описание'})
+        with django_assert_max_num_queries(20):
+            response = admin_client.post('/api/v1/titles/bulk/', items,
+                                         format='json')
+        assert response.status_code == 201
+        assert len(response.json()) == 21
+        assert Title.objects.count() == 21
+        old = Title.objects.get(name='Старое')
+        assert old.description == 'Новое описание'
+        assert list(old.genre.values_list('slug', flat=True)) == ['drama']
+        assert Title.objects.get(name='Произведение 3').genre.count() == 2
+
+    def test_titles_unknown_slugs(self, admin_client, catalog):
+        response = admin_client.post('/api/v1/titles/bulk/', [
+            {'name': 'A', 'year': 2000, 'category': 'movie',
+             'genre': ['drama']},
+            {'name': 'B', 'year': 2000, 'category': 'nope',
+             'genre': ['nope']},
+        ], format='json')
+        assert response.status_code == 400
+        assert response.json()[0] == {}
+        assert set(response.json()[1]) == {'category', 'genre'}
+
+    def test_bulk_is_admin_only(self, user_client):
+        response = user_client.post('/api/v1/genres/bulk/', [
+            {'name': 'Ужасы', 'slug': 'horror'},
+        ], format='json')
+        assert response.status_code == 403
+
+
+@pytest.mark.django_db(transaction=True)
+def test_bulk_upsert_refreshes_leaderboards(client, admin_client):
+    category = Category.objects.create(name='Фильм', slug='movie')
+    Genre.objects.create(name='Драма', slug='drama')
+    title = Title.objects.create(name='Title', year=2000, category=category)
+    TitleRanking.objects.create(board=TitleRanking.TOP, position=1,
+                                title=title, score=1)
+
+    def top_category():
+        return client.get('/api/v1/titles/top/').json()[0]['title'][
+            'category']['name']
+
+    assert top_category() == 'Фильм'
+    admin_client.post('/api/v1/categories/bulk/',
+                      [{'name': 'Кино', 'slug': 'movie'}], format='json')
+    assert top_category() == 'Кино'
+    response = admin_client.post('/api/v1/titles/bulk/', [{
+        'name': 'Title', 'year': 2000, 'category': 'movie',
+        'genre': ['drama'], 'description': 'Новое описание',
+    }], format='json')
+    assert response.status_code == 201
+    assert client.get('/api/v1/titles/top/').json()[0]['title'][
+        'description'] == 'Новое описание'
@@ -0,0 +1,63 @@
+import pytest
+from api.cache import get_generation
+from django.db import transaction
+from reviews.models import Category, Review, Title
+
+
+@pytest.mark.django_db(transaction=True)
+class TestCatalogCache:
+
+    def test_repeated_list_is_served_from_cache(
+            self, client, django_assert_num_queries):
+        Category.objects.create(name='Фильм', slug='movie')
+        client.get('/api/v1/categories/')
+        with django_assert_num_queries(0):
+            response = client.get('/api/v1/categories/')
+        assert response.json()['results'][0]['slug'] == 'movie'
+
+    def test_write_invalidates_cache(self, client, admin_client):
+        assert client.get('/api/v1/categories/').json()['count'] == 0
+        admin_client.post('/api/v1/categories/',
+                          {'name': 'Фильм', 'slug': 'movie'})
+        assert client.get('/api/v1/categories/').json()['count'] == 1
+
+    def test_etag_not_modified(self, client, admin_client):
+        etag = client.get('/api/v1/genres/')['ETag']
+        response = client.get('/api/v1/genres/', HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304
+        admin_client.post('/api/v1/genres/',
+                          {'name': 'Драма', 'slug': 'drama'})
+        response = client.get('/api/v1/genres/', HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert response['ETag'] != etag
+
+    def test_no_304_without_cached_response(self, client):
+        for path in ('/api/v1/titles/0/', '/api/v1/titles/0/stats/'):
+            response = client.get(path, HTTP_IF_NONE_MATCH='*')
+            assert response.status_code == 404, path
+
+    def test_cache_key_includes_host(self, client):
+        for number in range(3):
+            Category.objects.create(name=f'Категория {number}',
+                                    slug=f'category{number}')
+        url = '/api/v1/categories/?limit=1'
+        first = client.get(url, HTTP_HOST='a.example').json()['next']
+        second = client.get(url, HTTP_HOST='b.example').json()['next']
+        assert first.startswith('http://a.example/')
+        assert second.startswith('http://b.example/')
+
+    def test_review_score_refreshes_title(self, client, user):
+        title = Title.objects.create(name='Title', year=2000)
+        url = f'/api/v1/titles/{title.id}/'
+        assert client.get(url).json()['rating'] is None
+        Review.objects.create(title=title, author=user, text='text', score=8)
+        assert client.get(url).json()['rating'] == 8
+
+    def test_generation_bumped_after_commit(self):
+        before = get_generation('titles')
+        with transaction.atomic():
+            Title.objects.create(name='Title', year=2000)
+            # До фиксации читатели не должны кэшировать новые данные
+            # под новым поколением.
+            assert get_generation('titles') == before
+        assert get_generation('titles') != before
@@ -0,0 +1,66 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db.models import Count
+from reviews.dataset import DatasetGenerator
+from reviews.models import Comment, Review, Title
+
+
+@pytest.fixture
+def review(user):
+    title = Title.objects.create(name='Title', year=2000)
+    return Review.objects.create(title=title, author=user, text='text',
+                                 score=8)
+
+
+def comment_counts():
+    return dict(Review.objects.values_list('id', 'comment_count'))
+
+
+def actual_comment_counts():
+    return dict(Review.objects.annotate(
+        total=Count('comments')
+    ).values_list('id', 'total'))
+
+
+@pytest.mark.django_db
+class TestCounters:
+
+    def test_comment_count_follows_api(self, user_client, review):
+        url = f'/api/v1/titles/{review.title_id}/reviews/{review.id}/'
+        for _ in range(2):
+            user_client.post(f'{url}comments/', {'text': 'text'})
+        assert user_client.get(url).json()['comment_count'] == 2
+        comment = review.comments.first()
+        user_client.delete(f'{url}comments/{comment.id}/')
+        assert user_client.get(url).json()['comment_count'] == 1
+
+    def test_review_count_in_title(self, client, review, admin):
+        Review.objects.create(title=review.title, author=admin,
+                              text='text', score=2)
+        data = client.get(f'/api/v1/titles/{review.title_id}/').json()
+        assert data['review_count'] == 2
+
+    def test_dataset_counters_are_exact(self):
+        DatasetGenerator(titles=3, reviews_per_title=4,
+                         comments_per_review=2, seed=0).generate()
+        assert comment_counts() == actual_comment_counts()
+
+    def test_reconcile_repairs_drift(self, review, admin):
+        other = Review.objects.create(title=review.title, author=admin,
+                                      text='text', score=2)
+        Comment.objects.create(review=other, author=admin, text='text')
+        Review.objects.filter(pk=review.pk).update(comment_count=5)
+        Title.objects.update(rating_count=7, score_8_count=0)
+        out = StringIO()
+        call_command('reconcile_counters', '--batch-size', '1', stdout=out)
+        assert comment_counts() == {review.id: 0, other.id: 1}
+        title = Title.objects.get()
+        assert (title.rating_sum, title.rating_count) == (10, 2)
+        assert title.score_8_count == 1
+        assert 'проверено 2, исправлено 1' in out.getvalue()
+        out = StringIO()
+        call_command('reconcile_counters', stdout=out)
+        assert 'исправлено 0' in out.getvalue()
+        assert 'исправлено 1' not in out.getvalue()
@@ -0,0 +1,134 @@
+from io import StringIO
+
+import pytest
+from api.authentication import token_for_user
+from django.contrib import admin as django_admin
+from django.core.management import call_command
+from rest_framework.test import APIClient
+from reviews.admin import TitlesAdmin
+from reviews.dataset import DatasetGenerator
+from reviews.models import Comment, Review, Title, TitleRanking, User
+
+
+@pytest.fixture(autouse=True)
+def background_deletion(settings):
+    settings.BACKGROUND_DELETION = True
+
+
+@pytest.fixture
+def title(user, admin):
+    title = Title.objects.create(name='Title', year=2000)
+    other = Title.objects.create(name='Other', year=2001)
+    for number in range(5):
+        author = User.objects.create(username=f'author{number}',
+                                     email=f'author{number}@yamdb.fake')
+        review = Review.objects.create(title=title, author=author,
+                                       text='text', score=number + 1)
+        for _ in range(3):
+            Comment.objects.create(review=review, author=user, text='text')
+    Review.objects.create(title=other, author=user, text='text', score=9)
+    TitleRanking.objects.create(board=TitleRanking.TOP, position=1,
+                                title=title, score=1)
+    return title
+
+
+def run_deletions(batch_size=4):
+    out = StringIO()
+    call_command('run_deletions', '--once', '--batch-size', str(batch_size),
+                 stdout=out)
+    return out.getvalue()
+
+
+@pytest.mark.django_db
+class TestBackgroundDeletion:
+
+    def test_title_is_hidden_immediately(self, client, admin_client, title):
+        response = admin_client.delete(f'/api/v1/titles/{title.id}/')
+        assert response.status_code == 204
+        review = Review.objects.filter(title=title).first()
+        for path in (f'/api/v1/titles/{title.id}/',
+                     f'/api/v1/titles/{title.id}/reviews/',
+                     f'/api/v1/titles/{title.id}/reviews/{review.id}/',
+                     f'/api/v1/titles/{title.id}/reviews/{review.id}/'
+                     f'comments/{review.comments.first().id}/'):
+            assert client.get(path).status_code == 404, path
+        assert client.get('/api/v1/titles/').json()['count'] == 1
+        assert not TitleRanking.objects.exists()
+        # Строки на месте до запуска run_deletions.
+        assert Title._base_manager.filter(pk=title.pk).exists()
+        assert Comment.objects.count() == 15
+
+    def test_comments_of_hidden_title(self, admin_client, user_client,
+                                      title):
+        review = title.reviews.first()
+        admin_client.delete(f'/api/v1/titles/{title.id}/')
+        url = f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/'
+        assert user_client.get(url).status_code == 404
+        assert user_client.post(url, {'text': 'text'}).status_code == 404
+        assert Comment.objects.count() == 15
+
+    def test_worker_deletes_in_batches(self, admin_client, title):
+        admin_client.delete(f'/api/v1/titles/{title.id}/')
+        output = run_deletions(batch_size=4)
+        assert not Title._base_manager.filter(pk=title.pk).exists()
+        assert Review._base_manager.count() == 1
+        assert not Comment.objects.exists()
+        # 15 комментариев пакетами по 4, затем отзывы и произведение.
+        assert 'comments 4\n' in output
+        assert 'comments 15\n' in output
+        assert 'удалён' in output
+        assert run_deletions() == ''
+
+    def test_review_score_leaves_rating_once(self, admin_client, title):
+        review = title.reviews.get(score=5)
+        admin_client.delete(
+            f'/api/v1/titles/{title.id}/reviews/{review.id}/'
+        )
+        title.refresh_from_db()
+        assert (title.rating_sum, title.rating_count) == (10, 4)
+        assert title.score_5_count == 0
+        run_deletions()
+        title.refresh_from_db()
+        assert (title.rating_sum, title.rating_count) == (10, 4)
+        assert not Comment.objects.filter(review_id=review.id).exists()
+
+    def test_user_is_hidden_and_content_removed(self, admin_client, user,
+                                                title):
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {token_for_user(user)}'
+        )
+        admin_client.delete(f'/api/v1/users/{user.username}/')
+        assert client.get('/api/v1/titles/').status_code == 401
+        assert admin_client.get(
+            f'/api/v1/users/{user.username}/'
+        ).status_code == 404
+        run_deletions()
+        assert not User._base_manager.filter(pk=user.pk).exists()
+        assert not Comment.objects.exists()
+        other = Title.objects.get(name='Other')
+        assert (other.rating_sum, other.rating_count) == (0, 0)
+
+    def test_admin_hides_without_collecting(self, title):
+        model_admin = TitlesAdmin(Title, django_admin.site)
+        deleted, counts, perms, protected = model_admin.get_deleted_objects(
+            [title], None
+        )
+        assert deleted == ['Title'] and not protected
+        model_admin.delete_queryset(None, Title.objects.filter(pk=title.pk))
+        assert Title._base_manager.get(pk=title.pk).pending_deletion
+
+    def test_immediate_deletion_without_setting(self, admin_client, title,
+                                                settings):
+        settings.BACKGROUND_DELETION = False
+        admin_client.delete(f'/api/v1/titles/{title.id}/')
+        assert not Title._base_manager.filter(pk=title.pk).exists()
+        assert not Comment.objects.exists()
+
+    def test_dataset_skips_hidden_ids(self, admin_client, title):
+        last = Title.objects.create(name='Last', year=2002)
+        admin_client.delete(f'/api/v1/titles/{last.id}/')
+        DatasetGenerator(titles=2, reviews_per_title=1,
+                         comments_per_review=1, seed=0).generate()
+        assert Title._base_manager.count() == 5
+        assert Title._base_manager.get(pk=last.pk).pending_deletion
@@ -0,0 +1,77 @@
+import pytest
+from api.serializers import TitleSerializer
+from django.core.cache import cache
+from reviews.models import Category, Comment, Genre, Review, Title
+
+
+@pytest.fixture
+def catalog(user, admin):
+    category = Category.objects.create(name='Фильм', slug='movie')
+    drama = Genre.objects.create(name='Драма', slug='drama')
+    comedy = Genre.objects.create(name='Комедия', slug='comedy')
+    title = Title.objects.create(name='Title «кавычки»', year=2000,
+                                 category=category, description='Описание')
+    title.genre.add(drama, comedy)
+    Title.objects.create(name='Без категории', year=1999)
+    review = Review.objects.create(title=title, author=user,
+                                   text='Текст "с" \\  ', score=7)
+    Review.objects.create(title=title, author=admin, text='text', score=4)
+    Comment.objects.create(review=review, author=admin, text='Комментарий')
+    return title, review
+
+
+def get_both(client, settings, path):
+    '''Ответы обычного и быстрого пути на один и тот же запрос.'''
+    contents = []
+    for fast in (False, True):
+        settings.FAST_READ_SERIALIZATION = fast
+        cache.clear()
+        response = client.get(path)
+        assert response.status_code == 200
+        contents.append(response.content)
+    return contents
+
+
+@pytest.mark.django_db
+class TestFastRead:
+
+    @pytest.mark.parametrize('path', (
+        '/api/v1/titles/',
+        '/api/v1/titles/?genre=drama',
+        '/api/v1/titles/{title}/',
+        '/api/v1/titles/{title}/reviews/',
+        '/api/v1/titles/{title}/reviews/?cursor=&limit=1',
+        '/api/v1/titles/{title}/reviews/{review}/',
+        '/api/v1/titles/{title}/reviews/{review}/comments/',
+    ))
+    def test_responses_are_byte_identical(self, client, settings, catalog,
+                                          path):
+        title, review = catalog
+        path = path.format(title=title.id, review=review.id)
+        normal, fast = get_both(client, settings, path)
+        assert normal == fast
+
+    def test_fast_path_skips_serializer(self, client, settings, catalog,
+                                        monkeypatch,
+                                        django_assert_num_queries):
+        settings.FAST_READ_SERIALIZATION = True
+        monkeypatch.setattr(TitleSerializer, 'to_representation', None)
+        # Счётчик, страница, жанры страницы — как с prefetch_related.
+        with django_assert_num_queries(3):
+            response = client.get('/api/v1/titles/')
+        assert response.json()['results'][0]['genre']
+
+    def test_missing_object_is_404(self, client, settings, catalog):
+        settings.FAST_READ_SERIALIZATION = True
+        title, _ = catalog
+        assert client.get('/api/v1/titles/0/').status_code == 404
+        assert client.get(
+            f'/api/v1/titles/{title.id}/reviews/0/'
+        ).status_code == 404
+
+    def test_sparse_fields_use_serializer(self, client, settings, catalog):
+        title, _ = catalog
+        normal, fast = get_both(client, settings,
+                                f'/api/v1/titles/{title.id}/?fields=id,name')
+        assert normal == fast
+        assert fast.startswith(b'{"id":')
@@ -0,0 +1,48 @@
+import csv
+import os
+from io import StringIO
+
+import pytest
+from api.cache import get_generation
+from django.conf import settings
+from django.core.management import call_command
+from reviews.models import Comment, GenreTitle, Review, Title, User
+
+DATA_DIR = os.path.join(settings.BASE_DIR, 'static', 'data')
+
+
+def rows_in(filename):
+    with open(os.path.join(DATA_DIR, filename), encoding='utf-8') as f:
+        return sum(1 for _ in csv.DictReader(f))
+
+
+@pytest.mark.django_db
+class TestImportCsv:
+
+    def test_import_static_data(self):
+        call_command('import_csv', batch_size=7)
+        assert User.objects.count() == rows_in('users.csv')
+        assert Title.objects.count() == rows_in('titles.csv')
+        assert GenreTitle.objects.count() == rows_in('genre_title.csv')
+        assert Review.objects.count() == rows_in('review.csv')
+        assert Comment.objects.count() == rows_in('comments.csv')
+
+        review = Review.objects.get(pk=1)
+        assert review.pub_date.year == 2019
+        title = review.title
+        assert title.rating_count == title.reviews.count()
+
+    def test_import_is_repeatable(self):
+        call_command('import_csv')
+        call_command('import_csv')
+        assert Review.objects.count() == rows_in('review.csv')
+
+    def test_repeat_reports_skipped_duplicates(self):
+        call_command('import_csv')
+        before = get_generation('titles')
+        out = StringIO()
+        call_command('import_csv', stdout=out)
+        reviews = rows_in('review.csv')
+        assert (f'review.csv: загружено 0 строк, 0 строк/с, '
+                f'пропущено {reviews}') in out.getvalue()
+        assert get_generation('titles') != before
@@ -0,0 +1,83 @@
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+from reviews.leaderboards import top_rated, trending
+from reviews.models import Review, Title
+
+
+@pytest.fixture
+def authors(django_user_model):
+    return [
+        django_user_model.objects.create(username=f'author{number}',
+                                         email=f'author{number}@yamdb.fake')
+        for number in range(5)
+    ]
+
+
+def add_reviews(title, authors, score):
+    for author in authors:
+        Review.objects.create(title=title, author=author, text='text',
+                              score=score)
+
+
+@pytest.mark.django_db
+class TestLeaderboards:
+
+    def test_bayesian_rating_prefers_many_votes(self, authors):
+        single = Title.objects.create(name='Single', year=2000)
+        popular = Title.objects.create(name='Popular', year=2000)
+        weak = Title.objects.create(name='Weak', year=2000)
+        add_reviews(single, authors[:1], 10)
+        add_reviews(popular, authors, 9)
+        add_reviews(weak, authors, 2)
+        ranking = top_rated(10, min_votes=2)
+        assert [title_id for title_id, _ in ranking] == [
+            popular.id, single.id, weak.id
+        ]
+        assert ranking[0][1] == pytest.approx((45 + 2 * 65 / 11) / 7)
+
+    def test_trending_decays_with_age(self, authors):
+        now = timezone.now()
+        old = Title.objects.create(name='Old', year=2000)
+        fresh = Title.objects.create(name='Fresh', year=2000)
+        stale = Title.objects.create(name='Stale', year=2000)
+        add_reviews(old, authors[:1], 10)
+        add_reviews(fresh, authors[:1], 6)
+        add_reviews(stale, authors[:1], 10)
+        Review.objects.filter(title=old).update(
+            pub_date=now - timedelta(days=2))
+        Review.objects.filter(title=stale).update(
+            pub_date=now - timedelta(days=8))
+        ranking = trending(10, days=7, half_life_hours=24, now=now)
+        assert [title_id for title_id, _ in ranking] == [fresh.id, old.id]
+        assert ranking[1][1] == pytest.approx(0.25)
+
+    def test_top_endpoint(self, client, authors,
+                          django_assert_max_num_queries):
+        titles = [Title.objects.create(name=f'Title{number}', year=2000)
+                  for number in range(3)]
+        for score, title in enumerate(titles, 5):
+            add_reviews(title, authors, score)
+        call_command('refresh_leaderboards')
+        with django_assert_max_num_queries(2):
+            response = client.get('/api/v1/titles/top/?limit=2')
+        assert response.status_code == 200
+        assert [(entry['position'], entry['title']['id'])
+                for entry in response.json()] == [
+            (1, titles[2].id), (2, titles[1].id)
+        ]
+        response = client.get('/api/v1/titles/top/?board=trending')
+        assert len(response.json()) == 3
+        response = client.get('/api/v1/titles/top/?board=unknown')
+        assert response.status_code == 400
+
+    def test_refresh_invalidates_cache(self, client, authors):
+        title = Title.objects.create(name='Title', year=2000)
+        add_reviews(title, authors[:1], 8)
+        # До пересчёта рейтинг пуст, ответ попадает в кэш.
+        assert client.get('/api/v1/titles/top/').json() == []
+        call_command('refresh_leaderboards')
+        assert client.get('/api/v1/titles/top/').json()[0]['title'][
+            'rating'] == 8
@@ -0,0 +1,39 @@
+import os
+import re
+
+from .conftest import infra_dir_path
+
+
+def read_config():
+    with open(os.path.join(infra_dir_path, 'nginx', 'default.conf')) as f:
+        return f.read()
+
+
+class TestNginxConfig:
+
+    def test_upstream_keepalive(self):
+        config = read_config()
+        assert re.search(r'upstream\s+web\s*{[^}]*keepalive\s+\d+;', config)
+        assert re.search(r'proxy_http_version\s+1\.1;', config)
+        assert re.search(r'proxy_set_header\s+Connection\s+"";', config)
+
+    def test_gzip(self):
+        config = read_config()
+        assert re.search(r'gzip\s+on;', config)
+        assert re.search(r'gzip_types[^;]*application/json', config)
+
+    def test_anonymous_catalog_cache(self):
+        config = read_config()
+        assert re.search(r'proxy_cache_path\s+\S+.*keys_zone=api_cache',
+                         config)
+        assert re.search(
+            r'map\s+\$http_authorization\s+\$skip_cache\s*{\s*'
+            r'default\s+1;\s*""\s+0;', config
+        )
+        location = re.search(r'location ~ [^{]*titles[^{]*{([^}]*)}', config)
+        assert location, 'Нет location с кэшем каталога'
+        for directive in ('proxy_cache api_cache;',
+                          'proxy_cache_bypass $skip_cache;',
+                          'proxy_no_cache $skip_cache;',
+                          'X-Cache-Status $upstream_cache_status'):
+            assert directive in location.group(1)
@@ -0,0 +1,75 @@
+from unittest import mock
+
+import pytest
+from api.models import OutboxEmail
+from django.core import mail
+from django.core.mail import EmailMessage, get_connection
+from django.core.management import call_command
+
+
+@pytest.mark.django_db
+class TestOutbox:
+
+    def test_signup_queues_email(self, client):
+        response = client.post('/api/v1/auth/signup/', {
+            'username': 'new_user', 'email': 'new_user@yamdb.fake'
+        })
+        assert response.status_code == 200
+        assert len(mail.outbox) == 0
+        email = OutboxEmail.objects.get()
+        assert email.recipient == 'new_user@yamdb.fake'
+
+        call_command('run_outbox', once=True)
+        assert len(mail.outbox) == 1
+        assert mail.outbox[0].to == ['new_user@yamdb.fake']
+        email.refresh_from_db()
+        assert email.sent_at is not None
+
+    def test_failed_send_is_retried_later(self):
+        email = OutboxEmail.objects.create(
+            subject='subject', message='message',
+            from_email='admin@yamdb.fake', recipient='user@yamdb.fake'
+        )
+        with mock.patch('django.core.mail.EmailMessage.send',
+                        side_effect=OSError('smtp down')):
+            call_command('run_outbox', once=True)
+        email.refresh_from_db()
+        assert email.sent_at is None
+        assert email.attempts == 1
+        assert email.last_error == 'smtp down'
+        assert email.send_after > email.created
+
+        call_command('run_outbox', once=True)
+        assert len(mail.outbox) == 0
+
+    def test_sent_emails_survive_crash_mid_batch(self):
+        for number in range(3):
+            OutboxEmail.objects.create(
+                subject='subject', message='message',
+                from_email='admin@yamdb.fake',
+                recipient=f'user{number}@yamdb.fake'
+            )
+        send = EmailMessage.send
+        calls = []
+
+        def send_then_crash(message, *args, **kwargs):
+            calls.append(message.connection)
+            if len(calls) == 2:
+                raise KeyboardInterrupt
+            return send(message, *args, **kwargs)
+
+        with mock.patch('django.core.mail.EmailMessage.send',
+                        send_then_crash), mock.patch(
+            'api.management.commands.run_outbox.get_connection',
+            wraps=get_connection,
+        ) as connect, pytest.raises(KeyboardInterrupt):
+            call_command('run_outbox', once=True)
+        assert connect.call_count == 1
+        first, second, third = OutboxEmail.objects.all()
+        assert first.sent_at is not None
+        # Остальные забраны с попыткой и повторятся после send_after.
+        assert second.sent_at is None and third.sent_at is None
+        assert second.attempts == third.attempts == 1
+        assert second.send_after > second.created
+        call_command('run_outbox', once=True)
+        assert len(mail.outbox) == 1
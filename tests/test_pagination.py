@@ -0,0 +1,166 @@
+from base64 import b64decode
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+from api.pagination import PubDateCursorPagination, estimate_count
+from django.db import connections
+from django.utils import timezone
+from reviews.models import Review, Title, User
+
+
+@pytest.fixture
+def reviews():
+    title = Title.objects.create(name='Title', year=2000)
+    for i in range(15):
+        author = User.objects.create(
+            username=f'user{i}', email=f'user{i}@yamdb.fake'
+        )
+        Review.objects.create(title=title, author=author, text=str(i),
+                              score=5)
+    return title
+
+
+@pytest.mark.django_db
+class TestReviewsPagination:
+
+    def test_limit_offset_is_default(self, client, reviews):
+        response = client.get(
+            f'/api/v1/titles/{reviews.id}/reviews/?limit=5&offset=10'
+        )
+        data = response.json()
+        assert data['count'] == 15
+        assert len(data['results']) == 5
+
+    def test_cursor_walks_all_reviews(self, client, reviews):
+        url = f'/api/v1/titles/{reviews.id}/reviews/?cursor=&limit=4'
+        seen = []
+        while url:
+            data = client.get(url).json()
+            assert 'count' not in data
+            seen.extend(review['id'] for review in data['results'])
+            url = data['next']
+        assert seen == sorted(seen, reverse=True)
+        assert len(seen) == 15
+
+    @pytest.mark.parametrize('fast', (False, True))
+    def test_cursor_pages_through_equal_dates(self, client, reviews,
+                                              monkeypatch, settings, fast):
+        settings.FAST_READ_SERIALIZATION = fast
+        # Совпадающих дат больше, чем допускает смещение курсора DRF.
+        monkeypatch.setattr(PubDateCursorPagination, 'offset_cutoff', 2)
+        Review.objects.update(pub_date=timezone.now())
+        url = f'/api/v1/titles/{reviews.id}/reviews/?cursor=&limit=4'
+        pages = []
+        while url:
+            data = client.get(url).json()
+            pages.append([review['id'] for review in data['results']])
+            url, previous = data['next'], data['previous']
+            if url:
+                cursor = parse_qs(urlsplit(url).query)['cursor'][0]
+                assert 'o' not in parse_qs(b64decode(cursor).decode())
+        seen = [pk for page in pages for pk in page]
+        assert seen == sorted(Review.objects.values_list('id', flat=True),
+                              reverse=True)
+        back = []
+        while previous:
+            data = client.get(previous).json()
+            back.insert(0, [review['id'] for review in data['results']])
+            previous = data['previous']
+        assert back == pages[:-1]
+
+    @pytest.mark.parametrize('reverse, bound', ((False, '<='), (True, '>=')))
+    def test_keyset_bounds_the_index_range(self, reverse, bound):
+        position = f'{timezone.now().isoformat()} 10'
+        where = str(Review._base_manager.filter(
+            PubDateCursorPagination().keyset(position, reverse)
+        ).query).split(' WHERE ', 1)[1]
+        # Граница по pub_date стоит вне OR, индекс читается диапазоном.
+        assert where.startswith(f'("reviews_review"."pub_date" {bound} ')
+        assert ' AND (' in where and ' OR ' in where
+
+
+@pytest.mark.django_db
+class TestApproximateCount:
+
+    @pytest.fixture
+    def estimate(self, monkeypatch, settings):
+        settings.APPROXIMATE_COUNT_THRESHOLD = 1000
+        monkeypatch.setattr('api.pagination.estimate_count',
+                            lambda queryset: 5000)
+
+    def test_no_estimate_on_sqlite(self, reviews):
+        assert estimate_count(Review.objects.all()) is None
+
+    def test_estimates_are_cached(self, reviews, monkeypatch, settings):
+        settings.APPROXIMATE_COUNT_THRESHOLD = 1000
+        other = Title.objects.create(name='Other', year=2001)
+        calls = []
+        monkeypatch.setattr(connections['default'], 'vendor', 'postgresql')
+        monkeypatch.setattr(
+            'api.pagination.table_rows',
+            lambda connection, table: calls.append(table) or 5000
+        )
+        monkeypatch.setattr(
+            'api.pagination.explain_rows',
+            lambda connection, sql, params: calls.append(params) or 700
+        )
+        for _ in range(3):
+            assert estimate_count(reviews.reviews.all()) == 700
+        assert len(calls) == 2
+        assert estimate_count(other.reviews.all()) == 700
+        assert calls[2:] == [(other.id,)]
+
+    def test_empty_filter_estimates_zero(self, reviews, monkeypatch,
+                                         settings):
+        settings.APPROXIMATE_COUNT_THRESHOLD = 1000
+        monkeypatch.setattr(connections['default'], 'vendor', 'postgresql')
+        monkeypatch.setattr('api.pagination.table_rows',
+                            lambda connection, table: 5000)
+        monkeypatch.setattr('api.pagination.explain_rows', None)
+        assert estimate_count(Review.objects.filter(pk__in=[])) == 0
+
+    def test_small_table_skips_explain(self, reviews, monkeypatch):
+        monkeypatch.setattr(connections['default'], 'vendor', 'postgresql')
+        monkeypatch.setattr('api.pagination.table_rows',
+                            lambda connection, table: 15)
+        monkeypatch.setattr('api.pagination.explain_rows', None)
+        assert estimate_count(Review.objects.all()) == 15
+
+    def test_large_estimate_replaces_count(self, client, reviews, estimate,
+                                           django_assert_num_queries):
+        url = f'/api/v1/titles/{reviews.id}/reviews/?limit=5'
+        # Произведение и страница, без COUNT(*).
+        with django_assert_num_queries(2):
+            data = client.get(url).json()
+        assert data['count'] == 5000
+        assert data['count_approximate'] is True
+        assert len(data['results']) == 5
+        assert data['next'] is not None
+
+    def test_last_page_count_is_exact(self, client, reviews, estimate):
+        data = client.get(
+            f'/api/v1/titles/{reviews.id}/reviews/?limit=10&offset=10'
+        ).json()
+        assert data['count'] == 15
+        assert 'count_approximate' not in data
+        assert data['next'] is None
+
+    def test_estimate_below_offset_still_returns_page(
+            self, client, reviews, monkeypatch, settings):
+        settings.APPROXIMATE_COUNT_THRESHOLD = 1
+        monkeypatch.setattr('api.pagination.estimate_count',
+                            lambda queryset: 3)
+        data = client.get(
+            f'/api/v1/titles/{reviews.id}/reviews/?limit=4&offset=8'
+        ).json()
+        assert len(data['results']) == 4
+        assert data['count'] == 13
+        assert data['next'] is not None
+
+    def test_small_estimate_counts_exactly(self, client, reviews,
+                                           monkeypatch):
+        monkeypatch.setattr('api.pagination.estimate_count',
+                            lambda queryset: 15)
+        data = client.get(f'/api/v1/titles/{reviews.id}/reviews/').json()
+        assert data['count'] == 15
+        assert 'count_approximate' not in data
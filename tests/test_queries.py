@@ -0,0 +1,39 @@
+import pytest
+from reviews.models import Category, Genre, GenreTitle, Title
+
+
+@pytest.fixture
+def titles():
+    category = Category.objects.create(name='Фильм', slug='movie')
+    genres = [
+        Genre.objects.create(name=f'Жанр {i}', slug=f'genre-{i}')
+        for i in range(3)
+    ]
+    for i in range(10):
+        title = Title.objects.create(
+            name=f'Произведение {i}', year=2000, category=category
+        )
+        for genre in genres:
+            GenreTitle.objects.create(title=title, genre=genre)
+
+
+@pytest.mark.django_db
+class TestTitleQueries:
+
+    def test_titles_list_queries(self, client, titles,
+                                 django_assert_num_queries):
+        # count + произведения с категориями + жанры.
+        with django_assert_num_queries(3):
+            response = client.get('/api/v1/titles/')
+        assert response.status_code == 200
+        results = response.json()['results']
+        assert len(results) == 10
+        assert all(len(title['genre']) == 3 for title in results)
+        assert all(title['category']['slug'] == 'movie' for title in results)
+
+    def test_title_detail_queries(self, client, titles,
+                                  django_assert_num_queries):
+        title = Title.objects.first()
+        with django_assert_num_queries(2):
+            response = client.get(f'/api/v1/titles/{title.id}/')
+        assert response.status_code == 200
@@ -0,0 +1,133 @@
+from unittest import mock
+
+import pytest
+from django.core.management import call_command
+from django.db import transaction
+from django.db.models import QuerySet
+from reviews.models import Review, Title
+
+
+@pytest.mark.django_db
+class TestTitleRating:
+
+    def test_rating_follows_reviews(self, user_client, user, admin):
+        title = Title.objects.create(name='Title', year=2000)
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        response = user_client.post(url, {'text': 'text', 'score': 4})
+        assert response.status_code == 201
+        Review.objects.create(title=title, author=admin, text='text', score=9)
+        title.refresh_from_db()
+        assert (title.rating_sum, title.rating_count) == (13, 2)
+
+        review_id = response.json()['id']
+        user_client.patch(f'{url}{review_id}/', {'score': 7})
+        title.refresh_from_db()
+        assert (title.rating_sum, title.rating_count) == (16, 2)
+
+        user_client.delete(f'{url}{review_id}/')
+        title.refresh_from_db()
+        assert (title.rating_sum, title.rating_count) == (9, 1)
+        response = user_client.get(f'/api/v1/titles/{title.id}/')
+        assert response.json()['rating'] == 9
+
+    def test_score_update_locks_review(self, user_client, user):
+        title = Title.objects.create(name='Title', year=2000)
+        review = Review.objects.create(title=title, author=user,
+                                       text='text', score=4)
+        locked = []
+        select_for_update = QuerySet.select_for_update
+
+        def spy(queryset, *args, **kwargs):
+            locked.append((queryset.model, kwargs,
+                           transaction.get_connection().in_atomic_block))
+            return select_for_update(queryset, *args, **kwargs)
+
+        with mock.patch.object(QuerySet, 'select_for_update', spy):
+            response = user_client.patch(
+                f'/api/v1/titles/{title.id}/reviews/{review.id}/',
+                {'score': 7}
+            )
+        assert response.status_code == 200
+        assert locked == [(Review, {'of': ('self',)}, True)]
+
+    def test_recalculate_ratings_command(self, user, admin):
+        title = Title.objects.create(name='Title', year=2000)
+        Review.objects.create(title=title, author=user, text='text', score=2)
+        Review.objects.create(title=title, author=admin, text='text', score=5)
+        Title.objects.update(rating_sum=0, rating_count=0)
+        call_command('recalculate_ratings')
+        title.refresh_from_db()
+        assert (title.rating_sum, title.rating_count) == (7, 2)
+        assert title.rating == 3.5
+
+
+@pytest.mark.django_db(transaction=True)
+class TestTitleStats:
+
+    def test_histogram_follows_reviews(self, user_client, user, admin,
+                                       client, django_assert_num_queries):
+        title = Title.objects.create(name='Title', year=2000)
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        review_id = user_client.post(url, {'text': 'text', 'score': 4}
+                                     ).json()['id']
+        Review.objects.create(title=title, author=admin, text='text', score=9)
+        user_client.patch(f'{url}{review_id}/', {'score': 7})
+
+        with django_assert_num_queries(1):
+            response = client.get(f'/api/v1/titles/{title.id}/stats/')
+        assert response.status_code == 200
+        assert response.json() == {
+            'id': title.id, 'count': 2, 'mean': 8.0,
+            'histogram': [0, 0, 0, 0, 0, 0, 1, 0, 1, 0],
+        }
+
+        user_client.delete(f'{url}{review_id}/')
+        response = client.get(f'/api/v1/titles/{title.id}/stats/')
+        assert response.json()['histogram'] == [0] * 8 + [1, 0]
+
+    def test_empty_and_missing_title(self, client):
+        title = Title.objects.create(name='Title', year=2000)
+        response = client.get(f'/api/v1/titles/{title.id}/stats/')
+        assert response.json() == {'id': title.id, 'count': 0,
+                                   'mean': None, 'histogram': [0] * 10}
+        assert client.get('/api/v1/titles/0/stats/').status_code == 404
+
+    def test_recalculate_rebuilds_histogram(self, user, admin):
+        title = Title.objects.create(name='Title', year=2000)
+        Review.objects.create(title=title, author=user, text='text', score=2)
+        Review.objects.create(title=title, author=admin, text='text', score=2)
+        Title.objects.update(score_2_count=0, score_5_count=3)
+        call_command('recalculate_ratings')
+        title.refresh_from_db()
+        assert title.score_histogram == [0, 2] + [0] * 8
+
+
+@pytest.mark.django_db
+class TestReviewWritePath:
+
+    def test_duplicate_review_rejected_by_constraint(self, user_client):
+        title = Title.objects.create(name='Title', year=2000)
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        assert user_client.post(url, {'text': 'a', 'score': 5}
+                                ).status_code == 201
+        response = user_client.post(url, {'text': 'b', 'score': 1})
+        assert response.status_code == 400
+        assert 'non_field_errors' in response.json()
+        title.refresh_from_db()
+        assert (title.rating_sum, title.rating_count) == (5, 1)
+
+    def test_comment_needs_review_of_title(self, user_client, admin):
+        title = Title.objects.create(name='Title', year=2000)
+        other = Title.objects.create(name='Other', year=2000)
+        review = Review.objects.create(title=title, author=admin,
+                                       text='text', score=5)
+        response = user_client.post(
+            f'/api/v1/titles/{other.id}/reviews/{review.id}/comments/',
+            {'text': 'comment'}
+        )
+        assert response.status_code == 404
+        response = user_client.post(
+            f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/',
+            {'text': 'comment'}
+        )
+        assert response.status_code == 201
@@ -0,0 +1,123 @@
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+from api.middleware import ReplicaRoutingMiddleware
+from api.routers import current_request
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from django.test import RequestFactory
+
+from .conftest import root_dir
+
+# Отдельный процесс с двумя файлами SQLite: тестовая база pytest-django
+# одна, а здесь основная база и «реплика» расходятся, потому что
+# репликации между файлами нет.
+SCRIPT = '''
+import json
+
+import django
+from django.core.management import call_command
+
+django.setup()
+
+from django.test import Client
+from api.authentication import token_for_user
+from reviews.models import Review, Title, User
+
+for database in ('default', 'replica'):
+    call_command('migrate', database=database, verbosity=0)
+title = Title.objects.create(name='Title', year=2000)
+user = User.objects.create(username='author', email='author@yamdb.fake')
+# Произведение и пользователь на реплике, как после репликации, и отзыв,
+# которого нет в основной базе.
+title.save(using='replica')
+user.save(using='replica')
+Review.objects.using('replica').create(
+    id=100, title_id=title.id, author_id=user.id, text='replica', score=1
+)
+auth = {'HTTP_AUTHORIZATION': f'Bearer {token_for_user(user)}'}
+reviews = f'/api/v1/titles/{title.id}/reviews/'
+
+def texts(**extra):
+    response = Client().get(reviews, **extra)
+    return [review['text'] for review in response.json()['results']]
+
+result = {'anonymous_before': texts(), 'author_before': texts(**auth)}
+response = Client().post(reviews, {'text': 'primary', 'score': 5},
+                         content_type='application/json', **auth)
+result['post_status'] = response.status_code
+result['anonymous_after'] = texts()
+result['author_after'] = texts(**auth)
+print(json.dumps(result))
+'''
+
+
+class TestReplicaRouting:
+
+    def test_reads_replica_until_own_write(self, tmp_path):
+        env = {
+            **os.environ,
+            'DJANGO_SETTINGS_MODULE': 'api_yamdb.settings',
+            'DB_ENGINE': 'django.db.backends.sqlite3',
+            'DB_NAME': str(tmp_path / 'primary.sqlite3'),
+            'DB_REPLICA_NAME': str(tmp_path / 'replica.sqlite3'),
+            'CACHE_BACKEND':
+                'django.core.cache.backends.filebased.FileBasedCache',
+            'CACHE_LOCATION': str(tmp_path / 'cache'),
+        }
+        output = subprocess.run(
+            [sys.executable, '-c', SCRIPT], env=env, check=True,
+            cwd=os.path.join(root_dir, 'api_yamdb'),
+            capture_output=True, text=True,
+        ).stdout
+        result = json.loads(output.splitlines()[-1])
+        assert result['anonymous_before'] == ['replica']
+        assert result['author_before'] == ['replica']
+        assert result['post_status'] == 201
+        # Аноним по-прежнему читает с реплики, автор после записи — с
+        # основной базы и видит свой отзыв.
+        assert result['anonymous_after'] == ['replica']
+        assert result['author_after'] == ['primary']
+
+    def test_replica_requires_shared_cache(self, tmp_path):
+        env = {
+            **os.environ,
+            'DJANGO_SETTINGS_MODULE': 'api_yamdb.settings',
+            'DB_ENGINE': 'django.db.backends.sqlite3',
+            'DB_REPLICA_NAME': str(tmp_path / 'replica.sqlite3'),
+        }
+        env.pop('CACHE_BACKEND', None)
+        result = subprocess.run(
+            [sys.executable, '-c', 'import django; django.setup()'],
+            env=env, cwd=os.path.join(root_dir, 'api_yamdb'),
+            capture_output=True, text=True,
+        )
+        assert result.returncode != 0
+        assert 'ImproperlyConfigured' in result.stderr
+
+    def test_async_middleware_keeps_request_context(self):
+        async def view(request):
+            await asyncio.sleep(0.2)
+            # Поток пула видит запрос, как ReplicaRouter в async_views.
+            seen = await sync_to_async(current_request.get,
+                                       thread_sensitive=False)()
+            return HttpResponse(seen is request)
+
+        middleware = ReplicaRoutingMiddleware(view)
+        assert asyncio.iscoroutinefunction(middleware)
+
+        async def six_requests():
+            factory = RequestFactory()
+            return await asyncio.gather(*(
+                middleware(factory.get('/')) for _ in range(6)
+            ))
+
+        started = time.perf_counter()
+        responses = asyncio.run(six_requests())
+        assert time.perf_counter() - started < 0.6
+        assert all(response.content == b'True' for response in responses)
+        assert current_request.get() is None
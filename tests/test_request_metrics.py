@@ -0,0 +1,75 @@
+import asyncio
+import time
+
+import pytest
+from api.middleware import RequestMetricsMiddleware, registry
+from asgiref.sync import sync_to_async
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory
+from rest_framework.test import APIClient
+from reviews.models import Title
+
+
+@pytest.fixture
+def metrics(settings):
+    settings.MIDDLEWARE = (['api.middleware.RequestMetricsMiddleware']
+                           + settings.MIDDLEWARE)
+    registry.reset()
+    yield
+    registry.reset()
+
+
+@pytest.mark.django_db
+class TestRequestMetrics:
+
+    def test_metrics_per_route(self, metrics, admin):
+        Title.objects.create(name='Title', year=2000)
+        client = APIClient()
+        response = client.get('/api/v1/titles/')
+        assert 'db;dur=' in response['Server-Timing']
+        client.get('/api/v1/titles/')
+
+        client.force_authenticate(user=admin)
+        routes = client.get('/api/v1/metrics/').json()['routes']
+        assert routes['titles-list']['requests'] == 2
+        assert routes['titles-list']['queries']['max'] >= 2
+        assert sum(routes['titles-list']['wall_ms']['buckets'].values()) == 2
+
+    def test_metrics_admin_only(self, metrics, user_client):
+        assert user_client.get('/api/v1/metrics/').status_code == 403
+
+
+def test_async_requests_are_not_serialised():
+    async def slow_view(request):
+        await asyncio.sleep(0.2)
+        return HttpResponse()
+
+    middleware = RequestMetricsMiddleware(slow_view)
+    assert asyncio.iscoroutinefunction(middleware)
+
+    async def six_requests():
+        factory = RequestFactory()
+        return await asyncio.gather(*(
+            middleware(factory.get('/')) for _ in range(6)
+        ))
+
+    started = time.perf_counter()
+    responses = asyncio.run(six_requests())
+    assert time.perf_counter() - started < 0.6
+    assert all('total;dur=' in response['Server-Timing']
+               for response in responses)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_async_counts_queries_of_pool_threads():
+    def query(request):
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        return HttpResponse()
+
+    middleware = RequestMetricsMiddleware(
+        sync_to_async(query, thread_sensitive=False)
+    )
+    response = asyncio.run(middleware(RequestFactory().get('/')))
+    assert '"1 queries' in response['Server-Timing']
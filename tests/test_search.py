@@ -0,0 +1,19 @@
+import pytest
+from reviews.models import Title
+
+
+@pytest.mark.django_db
+class TestTitleSearch:
+
+    def test_search_ranks_name_matches_first(self, client):
+        in_description = Title.objects.create(
+            name='Крестный отец', year=1972,
+            description='Фильм о мафии и семье'
+        )
+        in_name = Title.objects.create(name='Тайны мафии', year=2002)
+        Title.objects.create(name='Побег из Шоушенка', year=1994)
+
+        response = client.get('/api/v1/titles/?search=мафи')
+        assert response.status_code == 200
+        ids = [title['id'] for title in response.json()['results']]
+        assert ids == [in_name.id, in_description.id]
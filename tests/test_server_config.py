@@ -0,0 +1,57 @@
+import runpy
+
+from api import signals
+
+from .conftest import root_dir
+
+GUNICORN_CONF = f'{root_dir}/api_yamdb/gunicorn.conf.py'
+
+
+class FakeConnection:
+    def __init__(self, usable, health_checks=True, in_atomic_block=False):
+        self.connection = object()
+        self.usable = usable
+        self.settings_dict = {'CONN_HEALTH_CHECKS': health_checks}
+        self.in_atomic_block = in_atomic_block
+
+    def is_usable(self):
+        return self.usable
+
+    def close(self):
+        self.connection = None
+
+
+class TestGunicornConfig:
+
+    def test_workers_follow_cpus(self, monkeypatch):
+        monkeypatch.delenv('GUNICORN_WORKERS', raising=False)
+        config = runpy.run_path(GUNICORN_CONF)
+        assert config['workers'] == config['available_cpus']() * 2 + 1
+        assert config['worker_class'] == 'gthread'
+        assert config['preload_app']
+        assert config['max_requests'] > 0
+
+    def test_env_overrides(self, monkeypatch):
+        monkeypatch.setenv('GUNICORN_WORKERS', '3')
+        monkeypatch.setenv('GUNICORN_PRELOAD', 'False')
+        config = runpy.run_path(GUNICORN_CONF)
+        assert config['workers'] == 3
+        assert not config['preload_app']
+
+
+class TestConnectionHealthChecks:
+
+    def test_closes_only_broken_connections(self, monkeypatch):
+        broken = FakeConnection(usable=False)
+        alive = FakeConnection(usable=True)
+        unchecked = FakeConnection(usable=False, health_checks=False)
+        in_transaction = FakeConnection(usable=False, in_atomic_block=True)
+        monkeypatch.setattr(
+            signals.connections, 'all',
+            lambda: [broken, alive, unchecked, in_transaction],
+        )
+        signals.check_connections()
+        assert broken.connection is None
+        assert alive.connection is not None
+        assert unchecked.connection is not None
+        assert in_transaction.connection is not None
@@ -0,0 +1,67 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from reviews.models import Category, Genre, Review, Title
+
+
+@pytest.fixture
+def title(user):
+    category = Category.objects.create(name='Фильм', slug='movie')
+    genre = Genre.objects.create(name='Драма', slug='drama')
+    title = Title.objects.create(name='Title', year=2000, category=category,
+                                 description='Длинное описание')
+    title.genre.add(genre)
+    Review.objects.create(title=title, author=user, text='text', score=7)
+    return title
+
+
+def get_with_queries(client, path):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(path)
+    assert response.status_code == 200
+    return response.json(), ' '.join(query['sql'] for query in context)
+
+
+@pytest.mark.django_db
+class TestSparseFields:
+
+    def test_titles_fields_narrow_sql(self, client, title):
+        data, sql = get_with_queries(
+            client, '/api/v1/titles/?fields=id,name,rating'
+        )
+        assert data['results'] == [{'id': title.id, 'name': 'Title',
+                                    'rating': 7}]
+        assert 'description' not in sql
+        assert 'reviews_category' not in sql
+        assert 'reviews_genre' not in sql
+
+    def test_titles_omit(self, client, title):
+        data, sql = get_with_queries(
+            client, f'/api/v1/titles/{title.id}/?omit=description,genre'
+        )
+        assert set(data) == {'id', 'name', 'year', 'rating', 'review_count',
+                             'category'}
+        assert data['category'] == {'name': 'Фильм', 'slug': 'movie'}
+        assert 'reviews_genre' not in sql
+
+    def test_reviews_fields_skip_author_join(self, client, title):
+        data, sql = get_with_queries(
+            client, f'/api/v1/titles/{title.id}/reviews/?fields=id,score'
+        )
+        assert data['results'][0].keys() == {'id', 'score'}
+        assert 'reviews_user' not in sql
+        data, sql = get_with_queries(
+            client, f'/api/v1/titles/{title.id}/reviews/?fields=author'
+        )
+        assert data['results'] == [{'author': 'TestUser'}]
+        assert '"text"' not in sql
+
+    def test_without_params_response_is_unchanged(self, client, title):
+        data, _ = get_with_queries(client, f'/api/v1/titles/{title.id}/')
+        assert set(data) == {'id', 'name', 'year', 'rating', 'review_count',
+                             'description', 'genre', 'category'}
+
+    def test_unknown_field(self, client, title):
+        response = client.get('/api/v1/titles/?fields=id,secret')
+        assert response.status_code == 400
+        assert 'secret' in response.json()['fields'][0]